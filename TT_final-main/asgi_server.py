@@ -0,0 +1,245 @@
+import io
+import os
+import sys
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from flask_server import (app as flask_app, DASHBOARD_CACHE, timetable_filters, faculty_timetable_filters,
+                          faculty_schedule, dashboard_scopes, dashboard_stats)
+from repository import BACKEND, get_repository
+from supabase_client import get_async_postgrest_client, close_async_postgrest_client
+from supabase_queries import select_query, count_query, fetch_all_pages_async
+from metrics import HTTP_REQUESTS, HTTP_LATENCY, db_request
+
+# Threads for the routes served by Flask (generation, writes, SSE streams). Each
+# request holds one thread for its whole duration, CPU work included.
+WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', '32'))
+
+Result = Tuple[int, Any]
+
+
+class QueryArgs(dict):
+    """First value of every query parameter, like request.args.get() in Flask."""
+
+    @classmethod
+    def parse(cls, query_string: bytes) -> 'QueryArgs':
+        args = cls()
+        for key, value in parse_qsl(query_string.decode('latin-1'), keep_blank_values=True):
+            args.setdefault(key, value)
+        return args
+
+
+# -- async read endpoints -------------------------------------------------------
+# Same filters, status codes and JSON bodies as the Flask routes of the same name.
+# Only used with the Supabase backend; a SQLite replica is served by Flask.
+
+async def execute(table: str, operation: str, query):
+    """Run one request, counted in /metrics like SupabaseRepository's."""
+    with db_request('supabase', table, operation):
+        return await query.execute()
+
+
+async def fetch_timetables(filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    client = get_async_postgrest_client()
+    return await fetch_all_pages_async(lambda: select_query(client, 'timetables', '*', filters),
+                                       execute=lambda query: execute('timetables', 'select', query))
+
+
+async def count_rows(client, table: str, filters: Dict[str, Any]) -> int:
+    return (await execute(table, 'count', count_query(client, table, filters))).count or 0
+
+
+async def get_timetables(args: QueryArgs) -> Result:
+    department = args.get('department')
+    if not department:
+        return 400, {'error': 'Department is required'}
+    return 200, await fetch_timetables({'department': department})
+
+
+async def get_timetable(args: QueryArgs) -> Result:
+    return 200, await fetch_timetables(timetable_filters(args))
+
+
+async def get_faculty_timetable(args: QueryArgs) -> Result:
+    faculty_name = args.get('faculty_name')
+    if not faculty_name:
+        return 400, {'error': 'Faculty name is required'}
+    rows = await fetch_timetables(faculty_timetable_filters(faculty_name, args.get('academic_year'),
+                                                            args.get('department')))
+    return 200, faculty_schedule(faculty_name, rows)
+
+
+async def get_dashboard_stats(args: QueryArgs) -> Result:
+    department = args.get('department')
+    fresh = args.get('fresh', '').lower() in ('1', 'true', 'yes')
+    if not fresh:
+        cached = DASHBOARD_CACHE.get(department)
+        if cached is not None:
+            return 200, cached
+    client = get_async_postgrest_client()
+    # The four counts are independent, so they are sent concurrently.
+    counts = await asyncio.gather(*(count_rows(client, table, filters)
+                                    for table, filters in dashboard_scopes(department)))
+    stats = dashboard_stats(*counts)
+    DASHBOARD_CACHE.set(department, stats)
+    return 200, stats
+
+
+ASYNC_ROUTES: Dict[str, Callable[[QueryArgs], Awaitable[Result]]] = {
+    '/get_timetables': get_timetables,
+    '/get_timetable': get_timetable,
+    '/get_faculty_timetable': get_faculty_timetable,
+    '/dashboard_stats': get_dashboard_stats
+}
+
+
+class ASGIServer:
+    """ASGI application: the read endpoints in ASYNC_ROUTES run on the event loop
+    against the async PostgREST client, so one process can keep hundreds of them
+    waiting on Supabase; every other request goes to the Flask app on a thread
+    pool, which keeps generation and other blocking work off the loop.
+
+    Run with: uvicorn asgi_server:app --host 0.0.0.0 --port 5000
+    """
+
+    def __init__(self, wsgi_app, routes: Dict[str, Callable[[QueryArgs], Awaitable[Result]]],
+                 threads: int = WSGI_THREADS):
+        self.wsgi_app = wsgi_app
+        self.routes = routes
+        self.threads = max(1, int(threads))
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='wsgi')
+        return self._executor
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            handler = self.routes.get(scope['path']) if scope['method'] == 'GET' else None
+            if handler is not None:
+                await self._serve_async(handler, scope, send)
+            else:
+                await self._serve_wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await close_async_postgrest_client()
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _serve_async(self, handler, scope, send) -> None:
+        started = time.perf_counter()
+        try:
+            status, body = await handler(QueryArgs.parse(scope.get('query_string', b'')))
+        except Exception as e:
+            status, body = 500, {'error': str(e)}
+        # Same series as the Flask route of this path (see flask_server.record_request_metrics).
+        HTTP_LATENCY.observe(time.perf_counter() - started, route=scope['path'], method='GET')
+        HTTP_REQUESTS.inc(route=scope['path'], method='GET', status=status)
+        payload = flask_app.json.dumps(body).encode('utf-8') + b'\n'
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode('latin-1')),
+            # flask-cors allows every origin on the Flask routes.
+            (b'access-control-allow-origin', b'*')
+        ]})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    # -- WSGI bridge ------------------------------------------------------------
+
+    def _environ(self, scope, body: bytes) -> Dict[str, Any]:
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False
+        }
+        for name, value in scope.get('headers', []):
+            key = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[key] = value
+            else:
+                key = f"HTTP_{key}"
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    async def _serve_wsgi(self, scope, receive, send) -> None:
+        chunks: List[bytes] = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        environ = self._environ(scope, b''.join(chunks))
+        loop = asyncio.get_running_loop()
+
+        def send_sync(message: Dict[str, Any]) -> None:
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        await loop.run_in_executor(self.executor, self._run_wsgi, environ, send_sync)
+
+    def _run_wsgi(self, environ: Dict[str, Any], send_sync: Callable[[Dict[str, Any]], None]) -> None:
+        """Runs on a worker thread; streams the body as the app yields it (SSE included)."""
+        response: Dict[str, Any] = {}
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+            response['start'] = {
+                'type': 'http.response.start', 'status': int(status.split(' ', 1)[0]),
+                'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+            }
+            return write
+
+        def write(data: bytes) -> None:
+            if 'start' in response:
+                send_sync(response.pop('start'))
+            send_sync({'type': 'http.response.body', 'body': data, 'more_body': True})
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    write(chunk)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        if 'start' in response:
+            send_sync(response.pop('start'))
+        send_sync({'type': 'http.response.body', 'body': b''})
+
+
+app = ASGIServer(flask_app, ASYNC_ROUTES if BACKEND == 'supabase' else {})
+
+
+if __name__ == '__main__':
+    import uvicorn
+    get_repository()
+    uvicorn.run(app, host='0.0.0.0', port=int(os.getenv('PORT', '5000')))
@@ -0,0 +1,186 @@
+import sys
+import time
+from typing import List, Dict, Any, Optional
+
+from placement_problem import PlacementProblem, PlacementState, Position
+from solver_progress import SolveProgress
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class BacktrackingSolver:
+    """Exact depth-first search over section placements.
+
+    Every session keeps a domain of positions that are still consistent with the
+    partial timetable; a lab's domain only holds continuous slot pairs. The next
+    session to place is the one with the smallest domain (most constrained first)
+    and after each placement the domains of the remaining sessions are filtered
+    (forward checking), so a dead end is detected as soon as any domain empties.
+    Interchangeable sessions (same subject, faculty, type and length) are kept in
+    increasing position order to avoid exploring their permutations. Each node
+    also checks a flow bound: the remaining periods must fit the free cells of
+    each day when a subject can use at most one day slot per day, which cuts off
+    the counting dead ends plain forward checking only finds by enumeration.
+
+    status after run(): 'solved', 'infeasible' (the search space was exhausted,
+    which proves no complete timetable exists) or 'timeout'.
+    """
+
+    def __init__(self, problem: PlacementProblem, time_limit: float = 10.0,
+                 progress: Optional[SolveProgress] = None):
+        self.problem = problem
+        self.time_limit = float(time_limit)
+        self.progress = progress
+        self.status: Optional[str] = None
+        self.nodes = 0
+        self._deadline = 0.0
+        self._free: set = set()
+
+        # prev_twin[i] / next_twin[i]: neighbouring interchangeable session, or -1.
+        n = len(problem.sessions)
+        self.prev_twin = [-1] * n
+        self.next_twin = [-1] * n
+        last: Dict[Any, int] = {}
+        for idx, s in enumerate(problem.sessions):
+            key = (s.subject_id, s.faculty_id, s.type)
+            if key in last:
+                self.prev_twin[idx] = last[key]
+                self.next_twin[last[key]] = idx
+            last[key] = idx
+
+    @classmethod
+    def from_options(cls, problem: PlacementProblem, options: Optional[Dict[str, Any]] = None,
+                     progress: Optional[SolveProgress] = None) -> 'BacktrackingSolver':
+        options = options or {}
+        kwargs = {k: options[k] for k in ('time_limit',) if options.get(k) is not None}
+        return cls(problem, progress=progress, **kwargs)
+
+    def _ordered(self, pos: Position, idx: int, state: PlacementState) -> bool:
+        # Only twins placed by this search are ordered; a given partial state is taken as is.
+        prev, nxt = self.prev_twin[idx], self.next_twin[idx]
+        if prev in self._free and state.positions[prev] is not None and pos <= state.positions[prev]:
+            return False
+        return not (nxt in self._free and state.positions[nxt] is not None and pos >= state.positions[nxt])
+
+    def _value_order(self, state: PlacementState, idx: int, domain: List[Position]) -> List[Position]:
+        # Fill mornings first so free periods end up at the end of the day, and
+        # spread labs over days; both keep the soft penalty low.
+        is_lab = self.problem.session_is_lab[idx]
+        return sorted(domain, key=lambda p: (state.labs_per_day[p[0]] if is_lab else 0,
+                                             (p[1] & -p[1]).bit_length(), p[0]))
+
+    def _capacity_ok(self, state: PlacementState, domains: Dict[int, List[Position]]) -> bool:
+        """Max-flow relaxation: subjects -> days (one session each per day) -> free cells."""
+        problem = self.problem
+        n_days = problem.n_days
+        demand: List[int] = []
+        day_caps: List[List[int]] = []
+        groups: Dict[int, int] = {}
+        for idx, domain in domains.items():
+            periods = problem.sessions[idx].periods
+            g = groups.get(problem.session_subject[idx]) if problem.session_tracks[idx] else None
+            if g is None:
+                g = len(demand)
+                demand.append(0)
+                day_caps.append([0] * n_days)
+                if problem.session_tracks[idx]:
+                    groups[problem.session_subject[idx]] = g
+            demand[g] += periods
+            for day_i, _ in domain:
+                day_caps[g][day_i] = max(day_caps[g][day_i], periods)
+
+        free = [problem.n_slots - m.bit_count() for m in state.day_masks]
+        need = sum(demand)
+        if need > sum(free):
+            return False
+
+        # Nodes: 0 source, 1..G groups, then days, then sink.
+        n_groups = len(demand)
+        sink = n_groups + n_days + 1
+        residual = [[0] * (sink + 1) for _ in range(sink + 1)]
+        for g in range(n_groups):
+            residual[0][g + 1] = demand[g]
+            for d in range(n_days):
+                residual[g + 1][n_groups + 1 + d] = day_caps[g][d]
+        for d in range(n_days):
+            residual[n_groups + 1 + d][sink] = free[d]
+
+        flow = 0
+        while flow < need:
+            parent = [-1] * (sink + 1)
+            parent[0] = 0
+            queue = [0]
+            for u in queue:
+                for v in range(sink + 1):
+                    if parent[v] < 0 and residual[u][v] > 0:
+                        parent[v] = u
+                        queue.append(v)
+            if parent[sink] < 0:
+                return False
+            amount = need
+            v = sink
+            while v:
+                amount = min(amount, residual[parent[v]][v])
+                v = parent[v]
+            v = sink
+            while v:
+                residual[parent[v]][v] -= amount
+                residual[v][parent[v]] += amount
+                v = parent[v]
+            flow += amount
+        return True
+
+    def _search(self, state: PlacementState, domains: Dict[int, List[Position]]) -> bool:
+        if not domains:
+            return True
+        if not self._capacity_ok(state, domains):
+            return False
+        self.nodes += 1
+        if self.nodes & 255 == 0:
+            if time.monotonic() > self._deadline:
+                raise SearchTimeout()
+            if self.progress is not None and self.progress.due():
+                total = len(self.problem.sessions)
+                self.progress.update('exact', total - len(domains), total, nodes=self.nodes)
+
+        idx = min(domains, key=lambda i: (len(domains[i]), -self.problem.sessions[i].periods))
+        rest = {i: d for i, d in domains.items() if i != idx}
+        for pos in self._value_order(state, idx, domains[idx]):
+            state.place(idx, pos)
+            pruned: Dict[int, List[Position]] = {}
+            for other, domain in rest.items():
+                remaining = [p for p in domain if state.can_place(other, p) and self._ordered(p, other, state)]
+                if not remaining:
+                    break
+                pruned[other] = remaining
+            else:
+                if self._search(state, pruned):
+                    return True
+            state.remove(idx)
+        return False
+
+    def run(self, state: Optional[PlacementState] = None) -> Optional[PlacementState]:
+        """Complete state (from scratch, or extending the given partial state) or None."""
+        started = time.monotonic()
+        self._deadline = started + self.time_limit
+        state = state.copy() if state is not None else self.problem.new_state()
+        pending = state.unplaced()
+        self._free = set(pending)
+
+        needed = sum(self.problem.sessions[i].periods for i in pending)
+        if needed > state.empty_cells():
+            self.status = 'infeasible'
+        else:
+            domains = {i: [p for p in self.problem.candidate_positions(i)
+                           if state.can_place(i, p) and self._ordered(p, i, state)] for i in pending}
+            try:
+                found = all(domains.values()) and self._search(state, domains)
+                self.status = 'solved' if found else 'infeasible'
+            except SearchTimeout:
+                self.status = 'timeout'
+
+        print(f"Backtracking search {self.status} after {self.nodes} nodes in "
+              f"{time.monotonic() - started:.2f}s", file=sys.stderr)
+        return state if self.status == 'solved' else None
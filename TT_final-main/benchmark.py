@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+MIT Mysore Timetable System - Offline Benchmark
+Generates a seeded synthetic college in memory and times the generators and
+validators against it: evolve_section (every engine of genetic_timetable_new
+and the legacy genetic_timetable), validate_timetable, find_swap_suggestions
+and the row building of save_to_supabase. No database or network is used.
+
+ok % is the share of calls that succeeded. The legacy validator reports a
+same-day repeat for every lab pair, so for validate_timetable and the legacy
+engine it is the share without hard clashes (HARD_CONFLICTS), and their
+conflicts are also counted by type. Sections an engine leaves partial are
+never saved, so they are validated one at a time in validate_timetable[engine,
+partial] rather than with the department's saved sections.
+
+    python benchmark.py --departments 4 --sections 3 --engines greedy ga legacy
+"""
+
+import io
+import json
+import math
+import time
+import random
+import argparse
+import contextlib
+from typing import List, Dict, Any, Optional, Iterable, Callable, Tuple
+
+from repository import TimetableRepository, TABLES
+from subject_catalog import invalidate_subject_cache
+from timetable_grid import TimetableGrid
+from solvers import ENGINES
+from genetic_timetable_new import SupabaseTimetableGA
+from genetic_timetable import SupabaseTimetableGA as LegacyTimetableGA
+
+DEPARTMENT_CODES = ['CSE', 'ISE', 'ECE', 'EEE', 'ME', 'CV', 'AIML', 'CSD']
+DAYS = 5
+SLOTS_PER_DAY = 6
+MAX_LABS_PER_WEEK = DAYS
+# Weekly classes of one theory subject
+MIN_THEORY_PER_WEEK = 2
+MAX_THEORY_PER_WEEK = 4
+# Conflicts of genetic_timetable.validate_timetable that make a timetable unusable
+HARD_CONFLICTS = ('faculty_double', 'room_double', 'lab_continuity')
+
+
+class MemoryRepository(TimetableRepository):
+    """Repository over in-memory lists; the benchmark's stand-in for Supabase."""
+
+    backend = 'memory'
+
+    def __init__(self):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {table: [] for table in TABLES}
+        self._next_id = 1
+
+    @staticmethod
+    def _matches(row: Dict[str, Any], filters, in_filters) -> bool:
+        for column, value in (filters or {}).items():
+            if row.get(column) != value:
+                return False
+        for column, values in (in_filters or {}).items():
+            if row.get(column) not in values:
+                return False
+        return True
+
+    def _rows(self, table, filters=None, in_filters=None) -> List[Dict[str, Any]]:
+        in_sets = {column: set(values) for column, values in (in_filters or {}).items()}
+        return [row for row in self.tables.setdefault(table, []) if self._matches(row, filters, in_sets)]
+
+    def select(self, table, columns='*', filters=None, in_filters=None, order=None, desc=False, limit=None):
+        rows = self._rows(table, filters, in_filters)
+        if order:
+            rows.sort(key=lambda r: (r.get(order) is None, r.get(order) if r.get(order) is not None else 0),
+                      reverse=desc)
+        if limit is not None:
+            rows = rows[:limit]
+        if columns.strip() == '*':
+            return [dict(row) for row in rows]
+        names = [c.strip() for c in columns.split(',')]
+        return [{c: row.get(c) for c in names} for row in rows]
+
+    def count(self, table, filters=None):
+        return len(self._rows(table, filters))
+
+    def insert(self, table, rows):
+        out = []
+        for row in rows:
+            stored = dict(row)
+            stored.setdefault('id', self._next_id)
+            self._next_id = max(self._next_id, stored['id']) + 1
+            self.tables.setdefault(table, []).append(stored)
+            out.append(dict(stored))
+        return out
+
+    def upsert(self, table, rows, on_conflict):
+        on_conflict = tuple(on_conflict)
+        existing = {tuple(row.get(c) for c in on_conflict): row for row in self.tables.setdefault(table, [])}
+        out, new = [], []
+        for row in rows:
+            stored = existing.get(tuple(row.get(c) for c in on_conflict))
+            if stored is None:
+                new.append(row)
+            else:
+                stored.update(row)
+                out.append(dict(stored))
+        return out + self.insert(table, new)
+
+    def delete(self, table, filters, in_filters=None):
+        in_sets = {column: set(values) for column, values in (in_filters or {}).items()}
+        kept, deleted = [], []
+        for row in self.tables.setdefault(table, []):
+            (deleted if self._matches(row, filters, in_sets) else kept).append(row)
+        self.tables[table] = kept
+        return deleted
+
+    def finalize_timetable(self, department, academic_year, year, semester, rows):
+        scope = {'department': department, 'academic_year': academic_year, 'year': year,
+                 'semester': semester, 'is_finalized': True}
+        self.delete('timetables', scope)
+        self.insert('timetables', [dict(row, **scope, faculty_department=row.get('faculty_department') or department,
+                                        is_cross_dept=bool(row.get('is_cross_dept')))
+                                   for row in rows])
+
+    def faculty_has_conflict(self, faculty_name, day, time_slot, academic_year):
+        return self.count('timetables', {'faculty_name': faculty_name, 'day': day, 'time_slot': time_slot,
+                                         'academic_year': academic_year, 'is_finalized': True}) > 0
+
+
+# -- synthetic college ------------------------------------------------------------
+
+def _theory_classes(rng: random.Random, n_theory: int, cells: int) -> List[int]:
+    """Split cells weekly classes over n_theory subjects, within MIN/MAX_THEORY_PER_WEEK where possible."""
+    base, extra = divmod(cells, n_theory)
+    classes = [base + (1 if i < extra else 0) for i in range(n_theory)]
+    for _ in range(n_theory):
+        a, b = rng.randrange(n_theory), rng.randrange(n_theory)
+        if a != b and classes[a] < MAX_THEORY_PER_WEEK and classes[b] > MIN_THEORY_PER_WEEK:
+            classes[a] += 1
+            classes[b] -= 1
+    rng.shuffle(classes)
+    return classes
+
+
+def synthetic_college(seed: int = 0, departments: int = 4, sections: int = 3, faculty_per_department: int = 12,
+                      subjects_per_section: int = 8, lab_ratio: float = 0.25, cross_dept_ratio: float = 0.1,
+                      max_faculty_load: int = 18, academic_year: str = '2025-26', year: int = 2,
+                      semester: int = 3) -> Dict[str, Any]:
+    """Seeded college: departments/subjects/faculty rows and one /generate request per department.
+
+    Every section's subjects fill its week exactly (labs take two periods), so a
+    department gets more than subjects_per_section subjects when its theory
+    would otherwise need over MAX_THEORY_PER_WEEK classes a week each;
+    lab_ratio is the share of subjects that are labs and cross_dept_ratio the
+    share of theory subjects taught by another department's faculty. Faculty
+    are assigned at random among those below max_faculty_load periods a week,
+    so the same faculty teach several sections and departments.
+    """
+    rng = random.Random(seed)
+    cells = DAYS * SLOTS_PER_DAY
+    codes = [DEPARTMENT_CODES[i] if i < len(DEPARTMENT_CODES) else f"D{i + 1:02d}" for i in range(departments)]
+
+    college: Dict[str, Any] = {'departments': [], 'subjects': [], 'faculty': [], 'requests': []}
+    faculty_by_dept: Dict[str, List[str]] = {}
+    for d_i, dept in enumerate(codes):
+        college['departments'].append({'id': d_i + 1, 'code': dept, 'name': dept})
+        faculty_by_dept[dept] = []
+        for f_i in range(faculty_per_department):
+            name = f"{dept} Faculty {f_i + 1:02d}"
+            faculty_by_dept[dept].append(name)
+            college['faculty'].append({'id': len(college['faculty']) + 1, 'department': dept, 'name': name,
+                                       'initials': f"{dept}{f_i + 1:02d}", 'designation': 'assistant_professor'})
+
+    load = {name: 0 for names in faculty_by_dept.values() for name in names}
+    for dept in codes:
+        n_labs = min(round(subjects_per_section * lab_ratio), MAX_LABS_PER_WEEK, subjects_per_section - 1)
+        theory_cells = cells - 2 * n_labs
+        n_theory = max(subjects_per_section - n_labs, math.ceil(theory_cells / MAX_THEORY_PER_WEEK))
+        subjects = []
+        for i, classes in enumerate(_theory_classes(rng, n_theory, theory_cells) + [1] * n_labs):
+            typ = 'lab' if i >= n_theory else 'theory'
+            teaching_dept = None
+            if typ == 'theory' and len(codes) > 1 and rng.random() < cross_dept_ratio:
+                teaching_dept = rng.choice([c for c in codes if c != dept])
+            subjects.append({
+                'id': len(college['subjects']) + 1, 'department': dept, 'academic_year': academic_year,
+                'year': year, 'semester': semester, 'sub_code': f"{dept}{semester}{i + 1:02d}",
+                'name': f"{dept} {'Lab' if typ == 'lab' else 'Subject'} {i + 1}", 'type': typ,
+                'weekly_hours': 2 if typ == 'lab' else classes, 'classes_per_week': classes,
+                'credits': 1 if typ == 'lab' else min(classes, 4), 'is_cross_dept': teaching_dept is not None,
+                'teaching_dept': teaching_dept, 'updated_at': '2025-01-01T00:00:00+00:00'
+            })
+        college['subjects'].extend(subjects)
+
+        request = {'department': dept, 'academic_year': academic_year, 'year': year, 'semester': semester,
+                   'sections': []}
+        for s_i in range(sections):
+            assignments = []
+            for subject in subjects:
+                periods = subject['classes_per_week'] * (2 if subject['type'] == 'lab' else 1)
+                pool = faculty_by_dept[subject['teaching_dept'] or dept]
+                free = [name for name in pool if load[name] + periods <= max_faculty_load]
+                name = rng.choice(free) if free else min(pool, key=lambda n: load[n])
+                load[name] += periods
+                assignments.append({'subject': subject['sub_code'], 'faculty': name})
+            request['sections'].append({'name': chr(ord('A') + s_i) if s_i < 26 else f"S{s_i + 1}",
+                                        'assignments': assignments})
+        college['requests'].append(request)
+    return college
+
+
+def load_college(repo: MemoryRepository, college: Dict[str, Any]) -> None:
+    for table in ('departments', 'subjects', 'faculty'):
+        repo.tables[table] = []
+        repo.insert(table, college[table])
+    repo.tables['timetables'] = []
+    repo.tables['faculty_assignments'] = []
+    invalidate_subject_cache()
+
+
+# -- measurement ------------------------------------------------------------------
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of values (0 < q <= 100)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(q / 100.0 * len(ordered)) - 1)]
+
+
+def conflict_types(result: Dict[str, Any]) -> List[str]:
+    return [c.get('type') for c in result.get('conflicts') or []]
+
+
+def no_hard_clashes(result: Dict[str, Any]) -> bool:
+    return not any(t in HARD_CONFLICTS for t in conflict_types(result))
+
+
+class Measurement:
+    """Timings of one benchmark case: call durations, successes, items processed and
+    conflicts reported, by type."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.times: List[float] = []
+        self.ok = 0
+        self.items = 0
+        self.conflicts: Dict[str, int] = {}
+
+    def add(self, seconds: float, ok: bool = True, items: int = 1, conflicts: Iterable[str] = ()) -> None:
+        self.times.append(seconds)
+        self.ok += 1 if ok else 0
+        self.items += items
+        for kind in conflicts:
+            self.conflicts[kind] = self.conflicts.get(kind, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        total = sum(self.times)
+        calls = len(self.times)
+        return {
+            'case': self.name,
+            'calls': calls,
+            'success_rate': round(self.ok / calls, 4) if calls else 0.0,
+            'total_s': round(total, 4),
+            'calls_per_s': round(calls / total, 2) if total else 0.0,
+            'items_per_s': round(self.items / total, 2) if total else 0.0,
+            'p50_ms': round(percentile(self.times, 50) * 1000, 3),
+            'p90_ms': round(percentile(self.times, 90) * 1000, 3),
+            'p99_ms': round(percentile(self.times, 99) * 1000, 3),
+            'max_ms': round(max(self.times) * 1000, 3) if self.times else 0.0,
+            'conflicts': dict(sorted(self.conflicts.items()))
+        }
+
+
+class Benchmark:
+    def __init__(self):
+        self.cases: Dict[str, Measurement] = {}
+
+    def timed(self, case: str, fn: Callable[..., Any], *args: Any,
+              ok: Callable[[Any], bool] = lambda result: True,
+              items: Callable[[Any], int] = lambda result: 1,
+              conflicts: Callable[[Any], Iterable[str]] = lambda result: (), **kwargs: Any) -> Any:
+        """Run fn with its output silenced and record it under case."""
+        sink = io.StringIO()
+        with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            started = time.perf_counter()
+            result = fn(*args, **kwargs)
+            elapsed = time.perf_counter() - started
+        self.cases.setdefault(case, Measurement(case)).add(elapsed, bool(ok(result)), items(result), conflicts(result))
+        return result
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        return [m.summary() for m in self.cases.values()]
+
+
+# -- cases --------------------------------------------------------------------------
+
+def positional(timetable: Dict[str, Dict[int, Any]], days: List[str]) -> Dict[str, Dict[int, Any]]:
+    """Re-key a timetable's slots 0..5 (the legacy validator's slot ids)."""
+    return {day: {i: entry for i, (_, entry) in enumerate(sorted((timetable.get(day) or {}).items()))}
+            for day in days}
+
+
+def department_grid(validator: LegacyTimetableGA, timetables: Dict[str, Dict[str, Dict[int, Any]]]) -> TimetableGrid:
+    """All sections of one department in one grid, so clashes between sections are checked too."""
+    grid = TimetableGrid(validator.days, validator.slot_ids, list(timetables))
+    for sec_i, timetable in enumerate(timetables.values()):
+        ids: Dict[int, int] = {}
+        for day_i, day in enumerate(grid.days):
+            for slot_i, slot_id in enumerate(grid.slot_ids):
+                entry = timetable[day].get(slot_id)
+                if entry:
+                    if id(entry) not in ids:
+                        ids[id(entry)] = grid.sessions.add(entry)
+                    grid.set(day_i, slot_i, ids[id(entry)], sec_i)
+    return grid
+
+
+def swap_conflict(rng: random.Random, timetable: Dict[str, Dict[int, Any]],
+                  vacate: float) -> Tuple[Dict[str, Dict[int, Any]], Optional[Dict[str, Any]]]:
+    """A copy of timetable with a share of its periods vacated, and a conflict on one remaining entry."""
+    copy = {day: dict(cells) for day, cells in timetable.items()}
+    taken = [(day, slot) for day, cells in copy.items() for slot, entry in cells.items()
+             if entry and entry.get('type') != 'free']
+    for day, slot in rng.sample(taken, int(len(taken) * vacate)):
+        copy[day][slot] = None
+    left = [entry for cells in copy.values() for entry in cells.values() if entry and entry.get('type') != 'free']
+    if not left:
+        return copy, None
+    return copy, {'type': 'benchmark', 'entries': [rng.choice(left)]}
+
+
+def run_engine(bench: Benchmark, repo: MemoryRepository, college: Dict[str, Any], engine: str,
+               engine_options: Dict[str, Any], seed: int, vacate: float) -> None:
+    """Generate every department of the college with one engine, then validate and probe the results."""
+    rng = random.Random(seed)
+    random.seed(seed)
+    repo.tables['timetables'] = []
+    validator = LegacyTimetableGA(repository=repo)
+    case = 'evolve_section[legacy]' if engine == 'legacy' else f"evolve_section[{engine}]"
+
+    for request in college['requests']:
+        department = request['department']
+        academic_year = request['academic_year']
+        if engine == 'legacy':
+            ga = validator
+        else:
+            ga = SupabaseTimetableGA(repository=repo)
+            ga.load_occupancy_index(academic_year, [a['faculty'] for sec in request['sections']
+                                                    for a in sec['assignments']])
+        generated: List[Dict[str, Any]] = []
+        timetables: Dict[str, Dict[str, Dict[int, Any]]] = {}
+        partial: Dict[str, Dict[str, Dict[int, Any]]] = {}
+        for sec in request['sections']:
+            if engine == 'legacy':
+                res = bench.timed(case, ga.evolve_section, department, sec['name'], sec['assignments'],
+                                  academic_year, request['year'], request['semester'],
+                                  ok=no_hard_clashes, conflicts=conflict_types)
+            else:
+                res = bench.timed(case, ga.evolve_section, department, sec['name'], sec['assignments'],
+                                  other_timetables=generated, engine=engine, engine_options=engine_options,
+                                  academic_year=academic_year, progress=lambda event: None,
+                                  ok=lambda r: r.get('valid'))
+                if res.get('valid'):
+                    generated.append(res)
+            timetable = res.get('timetable')
+            if not timetable:
+                continue
+            rows = bench.timed('build_save_rows', ga.build_save_rows, timetable, sec['name'], department,
+                               academic_year, request['year'], request['semester'], items=len)
+            if res.get('valid'):
+                # Saved like /generate does, so later departments see these faculty as busy.
+                repo.replace_section_timetable(department, sec['name'], academic_year,
+                                               request['year'], request['semester'], rows)
+                timetables[sec['name']] = positional(timetable, validator.days)
+            else:
+                partial[sec['name']] = positional(timetable, validator.days)
+
+        if timetables:
+            bench.timed(f"validate_timetable[{engine}]", validator.validate_timetable,
+                        department_grid(validator, timetables), ok=no_hard_clashes,
+                        items=lambda r: len(timetables), conflicts=conflict_types)
+        # Partial sections are never saved, so no other section was placed around them;
+        # each is checked on its own.
+        for name, timetable in partial.items():
+            bench.timed(f"validate_timetable[{engine}, partial]", validator.validate_timetable,
+                        department_grid(validator, {name: timetable}), ok=no_hard_clashes,
+                        items=lambda r: 1, conflicts=conflict_types)
+        existing = repo.timetable_rows(academic_year)
+        busy = validator.faculty_busy_index(existing)
+        for timetable in list(timetables.values()) + list(partial.values()):
+            vacated, conflict = swap_conflict(rng, timetable, vacate)
+            if conflict is None:
+                continue
+            bench.timed('find_swap_suggestions', validator.find_swap_suggestions, vacated, conflict, existing,
+                        busy=busy, ok=bool)
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    bench = Benchmark()
+    shape: Dict[str, Any] = {}
+    for run in range(args.repeat):
+        seed = args.seed + run
+        college = synthetic_college(seed, args.departments, args.sections, args.faculty, args.subjects,
+                                    args.lab_ratio, args.cross_dept_ratio, args.max_load)
+        shape = {'departments': len(college['departments']), 'sections': sum(len(r['sections']) for r in college['requests']),
+                 'subjects': len(college['subjects']), 'faculty': len(college['faculty']),
+                 'cross_dept_subjects': sum(1 for s in college['subjects'] if s['is_cross_dept'])}
+        repo = MemoryRepository()
+        load_college(repo, college)
+        for engine in args.engines:
+            options = {'seed': seed, 'time_limit': args.time_limit}
+            if args.generations:
+                options['generations'] = args.generations
+            run_engine(bench, repo, college, engine, options, seed, args.vacate)
+    return {'college': shape, 'repeat': args.repeat, 'seed': args.seed, 'cases': bench.summaries()}
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    college = report['college']
+    print(f"College: {college['departments']} departments, {college['sections']} sections, "
+          f"{college['subjects']} subjects ({college['cross_dept_subjects']} cross-department), "
+          f"{college['faculty']} faculty; {report['repeat']} run(s) from seed {report['seed']}")
+    header = ['case', 'calls', 'ok %', 'total s', 'calls/s', 'items/s', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms']
+    rows = [[c['case'], c['calls'], f"{c['success_rate'] * 100:.1f}", f"{c['total_s']:.3f}", c['calls_per_s'],
+             c['items_per_s'], c['p50_ms'], c['p90_ms'], c['p99_ms'], c['max_ms']] for c in report['cases']]
+    widths = [max(len(str(v)) for v in col) for col in zip(header, *rows)]
+    for row in [header] + rows:
+        print('  '.join(str(v).ljust(w) if i == 0 else str(v).rjust(w) for i, (v, w) in enumerate(zip(row, widths))))
+    for c in report['cases']:
+        if c['conflicts']:
+            print(f"{c['case']} conflicts: " + ', '.join(f"{kind} {n}" for kind, n in c['conflicts'].items()))
+
+
+def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Offline benchmark of the timetable generators and validators')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help='runs, each on a new college (seed, seed+1, ...)')
+    parser.add_argument('--departments', type=int, default=4)
+    parser.add_argument('--sections', type=int, default=3, help='sections per department')
+    parser.add_argument('--faculty', type=int, default=12, help='faculty per department')
+    parser.add_argument('--subjects', type=int, default=8, help='subjects per section')
+    parser.add_argument('--lab-ratio', type=float, default=0.25)
+    parser.add_argument('--cross-dept-ratio', type=float, default=0.1)
+    parser.add_argument('--max-load', type=int, default=18, help='periods a week per faculty')
+    parser.add_argument('--engines', nargs='+', default=['greedy', 'ga', 'legacy'],
+                        choices=list(ENGINES) + ['legacy'])
+    parser.add_argument('--time-limit', type=float, default=2.0, help='seconds per section for search engines')
+    parser.add_argument('--generations', type=int, default=0)
+    parser.add_argument('--vacate', type=float, default=0.2,
+                        help='share of periods vacated before probing find_swap_suggestions')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    report = run_benchmark(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
@@ -0,0 +1,67 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Thread-safe in-process cache with a per-entry TTL and LRU eviction.
+
+    Expired entries are not returned by get() but stay available to peek() until
+    evicted, so callers can revalidate them cheaply instead of reloading.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self.clock = clock
+        self._data: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= self.clock():
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value even if it has expired, without touching stats or LRU order."""
+        with self._lock:
+            item = self._data.get(key)
+            return default if item is None else item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (self.clock() + (self.ttl if ttl is None else float(ttl)), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drop every entry whose key matches predicate (all entries when None)."""
+        with self._lock:
+            keys = [k for k in self._data if predicate is None or predicate(k)]
+            for k in keys:
+                del self._data[k]
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
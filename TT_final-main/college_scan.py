@@ -0,0 +1,187 @@
+import time
+from array import array
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+from placement_problem import mask_slots
+
+# Columns the scan reads from timetables.
+SCAN_COLUMNS = 'department,year,semester,section,day,time_slot,subject_code,faculty_name,room,type'
+
+# (class, day, subject_code, is_lab, faculty, room) -> slot bitmask
+GroupKey = Tuple[int, int, str, bool, int, int]
+
+
+class CollegeScan:
+    """College-wide clash scan over timetables rows.
+
+    Rows are folded page by page into one slot bitmask per (class, day, subject,
+    faculty, room), so a page can be dropped once it is read. report() expands
+    labs to their continuous pairs and fills flat faculty x day x slot,
+    room x day x slot and class x day x slot count arrays; every cell counted
+    twice is a clash. A class is (department, year, semester, section).
+    """
+
+    def __init__(self, days: List[str], slot_ids: List[int], continuous_slots: List[List[int]]):
+        self.days = list(days)
+        self.slot_ids = list(slot_ids)
+        self.day_index = {d: i for i, d in enumerate(self.days)}
+        self.slot_index = {s: i for i, s in enumerate(self.slot_ids)}
+        self.n_cells = len(self.days) * len(self.slot_ids)
+        # (pair mask, bit of the pair's first slot); a lab stored once sits at the first slot.
+        self.pairs = [(sum(1 << self.slot_index[s] for s in pair), 1 << self.slot_index[pair[0]])
+                      for pair in continuous_slots]
+        self.classes: Dict[Tuple[Any, ...], int] = {}
+        self.faculty: Dict[str, int] = {}
+        self.rooms: Dict[str, int] = {}
+        self.groups: Dict[GroupKey, int] = {}
+        self.rows_scanned = 0
+        self.skipped_rows = 0
+
+    @staticmethod
+    def _intern(ids: Dict[Any, int], value: Any) -> int:
+        if not value or value == 'N/A':
+            return -1
+        return ids.setdefault(value, len(ids))
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.rows_scanned += 1
+            subject = row.get('subject_code')
+            kind = (row.get('type') or 'theory').lower()
+            if kind == 'free' or not subject or subject == 'FREE':
+                continue
+            day_i = self.day_index.get(row.get('day'))
+            try:
+                slot_i = self.slot_index.get(int(row.get('time_slot')))
+            except (TypeError, ValueError):
+                slot_i = None
+            if day_i is None or slot_i is None:
+                self.skipped_rows += 1
+                continue
+            class_key = (row.get('department'), row.get('year'), row.get('semester'), row.get('section'))
+            key = (self.classes.setdefault(class_key, len(self.classes)), day_i, subject, kind == 'lab',
+                   self._intern(self.faculty, row.get('faculty_name')), self._intern(self.rooms, row.get('room')))
+            self.groups[key] = self.groups.get(key, 0) | (1 << slot_i)
+
+    def _lab_blocks(self, mask: int) -> Tuple[int, int, int]:
+        """(slots covered by whole labs, number of labs, lab slots outside any pair)."""
+        cover = blocks = 0
+        for pair_mask, first_bit in self.pairs:
+            if mask & first_bit:
+                cover |= pair_mask
+                blocks += 1
+        return cover, blocks, mask & ~cover
+
+    def _class_dict(self, names: List[Tuple[Any, ...]], class_i: int) -> Dict[str, Any]:
+        department, year, semester, section = names[class_i]
+        return {'department': department, 'year': year, 'semester': semester, 'section': section}
+
+    def report(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Clashes, lab-continuity breaks and same-day repeats; lists are cut at limit."""
+        n_slots = len(self.slot_ids)
+        class_names = list(self.classes)
+        faculty_names = list(self.faculty)
+        room_names = list(self.rooms)
+        counts = {
+            'faculty': array('H', bytes(2 * len(self.faculty) * self.n_cells)),
+            'room': array('H', bytes(2 * len(self.rooms) * self.n_cells)),
+            'class': array('H', bytes(2 * len(self.classes) * self.n_cells)),
+        }
+        clash_cells: Dict[str, List[int]] = {'faculty': [], 'room': [], 'class': []}
+
+        def count(kind: str, owner: int, day_i: int, mask: int) -> None:
+            base = owner * self.n_cells + day_i * n_slots
+            for slot_i in mask_slots(mask):
+                cell = base + slot_i
+                counts[kind][cell] += 1
+                if counts[kind][cell] == 2:
+                    clash_cells[kind].append(cell)
+
+        # A subject's lab rows are merged first: batches of one lab taught by two
+        # faculty are one session of the class, not a clash or a repeat.
+        subjects: Dict[Tuple[int, int, str, bool], int] = {}
+        for (class_i, day_i, subject, is_lab, _, _), mask in self.groups.items():
+            key = (class_i, day_i, subject, is_lab)
+            subjects[key] = subjects.get(key, 0) | mask
+        per_day: Dict[Tuple[int, int, str], int] = {}
+        lab_breaks: List[Dict[str, Any]] = []
+        for (class_i, day_i, subject, is_lab), mask in subjects.items():
+            if is_lab:
+                cover, sessions, stray = self._lab_blocks(mask)
+                for slot_i in mask_slots(stray):
+                    lab_breaks.append(dict(self._class_dict(class_names, class_i), day=self.days[day_i],
+                                           time_slot=self.slot_ids[slot_i], subject_code=subject))
+                mask = cover | stray
+                sessions += len(mask_slots(stray))
+            else:
+                sessions = len(mask_slots(mask))
+            per_day[(class_i, day_i, subject)] = per_day.get((class_i, day_i, subject), 0) + sessions
+            count('class', class_i, day_i, mask)
+
+        expanded: List[Tuple[GroupKey, int]] = []
+        for key, mask in self.groups.items():
+            class_i, day_i, subject, is_lab, faculty_i, room_i = key
+            if is_lab:
+                cover, _, stray = self._lab_blocks(mask)
+                mask = cover | stray
+            expanded.append((key, mask))
+            if faculty_i >= 0:
+                count('faculty', faculty_i, day_i, mask)
+            if room_i >= 0:
+                count('room', room_i, day_i, mask)
+
+        # Second look at the few groups that touch a clashing cell, to name who clashes.
+        wanted = {kind: set(cells) for kind, cells in clash_cells.items()}
+        occupants: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        for (class_i, day_i, subject, is_lab, faculty_i, room_i), mask in expanded:
+            base = day_i * n_slots
+            for slot_i in mask_slots(mask):
+                for kind, owner in (('faculty', faculty_i), ('room', room_i), ('class', class_i)):
+                    cell = owner * self.n_cells + base + slot_i
+                    if owner >= 0 and cell in wanted[kind]:
+                        occupant = dict(self._class_dict(class_names, class_i), subject_code=subject,
+                                        faculty_name=faculty_names[faculty_i] if faculty_i >= 0 else None,
+                                        room=room_names[room_i] if room_i >= 0 else None)
+                        if occupant not in occupants.setdefault((kind, cell), []):
+                            occupants[(kind, cell)].append(occupant)
+
+        def clashes(kind: str, label: str, names: List[Any]) -> List[Dict[str, Any]]:
+            out = []
+            for cell in clash_cells[kind]:
+                owner, rest = divmod(cell, self.n_cells)
+                day_i, slot_i = divmod(rest, n_slots)
+                entry = self._class_dict(names, owner) if kind == 'class' else {label: names[owner]}
+                entry.update(day=self.days[day_i], time_slot=self.slot_ids[slot_i], count=counts[kind][cell],
+                             occupants=occupants.get((kind, cell), []))
+                out.append(entry)
+            return out
+
+        repeats = [dict(self._class_dict(class_names, class_i), day=self.days[day_i], subject_code=subject, count=n)
+                   for (class_i, day_i, subject), n in per_day.items() if n > 1]
+        found = {
+            'faculty_clashes': clashes('faculty', 'faculty_name', faculty_names),
+            'room_clashes': clashes('room', 'room', room_names),
+            'section_clashes': clashes('class', '', class_names),
+            'lab_continuity': lab_breaks,
+            'same_day_repeats': repeats,
+        }
+        summary = {name: len(items) for name, items in found.items()}
+        if limit is not None:
+            found = {name: items[:limit] for name, items in found.items()}
+        return dict(found, valid=not any(summary.values()), summary=summary, rows_scanned=self.rows_scanned,
+                    skipped_rows=self.skipped_rows, sections=len(self.classes), faculty=len(self.faculty),
+                    rooms=len(self.rooms))
+
+
+def scan_college(repository, academic_year: str, days: List[str], slot_ids: List[int],
+                 continuous_slots: List[List[int]], finalized: Optional[bool] = True,
+                 limit: Optional[int] = None) -> Dict[str, Any]:
+    """Scan every timetables row of academic_year, streamed page by page from repository."""
+    started = time.perf_counter()
+    scan = CollegeScan(days, slot_ids, continuous_slots)
+    for page in repository.timetable_pages(academic_year, finalized, columns=SCAN_COLUMNS):
+        scan.add_rows(page)
+    result = scan.report(limit)
+    result.update(academic_year=academic_year, finalized=finalized,
+                  elapsed_ms=round((time.perf_counter() - started) * 1000, 1))
+    return result
@@ -144,6 +144,18 @@ CREATE TABLE IF NOT EXISTS time_slots (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- =====================================================
+-- 7b. ROOMS (Classrooms and labs the generator books)
+-- =====================================================
+CREATE TABLE IF NOT EXISTS rooms (
+    id BIGSERIAL PRIMARY KEY,
+    name VARCHAR(50) UNIQUE NOT NULL,
+    type VARCHAR(20) NOT NULL DEFAULT 'classroom' CHECK (type IN ('classroom', 'lab')),
+    capacity INTEGER CHECK (capacity >= 1),
+    department VARCHAR(10),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- =====================================================
 -- 8. INDEXES FOR PERFORMANCE
 -- =====================================================
@@ -158,6 +170,8 @@ CREATE INDEX IF NOT EXISTS idx_faculty_name ON faculty(name);
 CREATE INDEX IF NOT EXISTS idx_timetables_dept_section ON timetables(department, section);
 CREATE INDEX IF NOT EXISTS idx_timetables_faculty ON timetables(faculty_name);
 CREATE INDEX IF NOT EXISTS idx_timetables_day_slot ON timetables(day, time_slot);
+CREATE UNIQUE INDEX IF NOT EXISTS unique_section_slot ON timetables(department, academic_year, year, semester, section, day, time_slot, is_finalized);
+CREATE INDEX IF NOT EXISTS idx_timetables_year_room ON timetables(academic_year, room);
 
 CREATE INDEX IF NOT EXISTS idx_users_dept ON users(department);
 
@@ -230,6 +244,7 @@ ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE sections ENABLE ROW LEVEL SECURITY;
 ALTER TABLE faculty_assignments ENABLE ROW LEVEL SECURITY;
 ALTER TABLE time_slots ENABLE ROW LEVEL SECURITY;
+ALTER TABLE rooms ENABLE ROW LEVEL SECURITY;
 
 -- =====================================================
 -- 11. RLS POLICIES (Allow all for now)
@@ -255,6 +270,9 @@ CREATE POLICY "Allow all operations on faculty_assignments" ON faculty_assignmen
 DROP POLICY IF EXISTS "Allow all operations on time_slots" ON time_slots;
 CREATE POLICY "Allow all operations on time_slots" ON time_slots FOR ALL USING (true);
 
+DROP POLICY IF EXISTS "Allow all operations on rooms" ON rooms;
+CREATE POLICY "Allow all operations on rooms" ON rooms FOR ALL USING (true);
+
 -- =====================================================
 -- 12. FUNCTIONS AND TRIGGERS
 -- =====================================================
@@ -278,6 +296,45 @@ DROP TRIGGER IF EXISTS update_users_updated_at ON users;
 CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Replace the finalized timetable of one department/year/semester in a single
+-- transaction (used by /finalize_timetable)
+CREATE OR REPLACE FUNCTION finalize_timetable(
+    p_department TEXT,
+    p_academic_year TEXT,
+    p_year INTEGER,
+    p_semester INTEGER,
+    p_rows JSONB
+) RETURNS INTEGER AS $$
+DECLARE
+    saved INTEGER;
+BEGIN
+    DELETE FROM timetables
+    WHERE department = p_department
+    AND academic_year = p_academic_year
+    AND year = p_year
+    AND semester = p_semester
+    AND is_finalized = true;
+
+    INSERT INTO timetables (
+        department, section, day, time_slot, subject_name, subject_code,
+        faculty_name, faculty_department, room, type, academic_year, year,
+        semester, is_cross_dept, teaching_dept, is_finalized
+    )
+    SELECT p_department, r.section, r.day, r.time_slot, r.subject_name, r.subject_code,
+           r.faculty_name, COALESCE(r.faculty_department, p_department), r.room, r.type,
+           p_academic_year, p_year, p_semester, COALESCE(r.is_cross_dept, false),
+           r.teaching_dept, true
+    FROM jsonb_to_recordset(p_rows) AS r(
+        section TEXT, day TEXT, time_slot INTEGER, subject_name TEXT, subject_code TEXT,
+        faculty_name TEXT, faculty_department TEXT, room TEXT, type TEXT,
+        is_cross_dept BOOLEAN, teaching_dept TEXT
+    );
+
+    GET DIAGNOSTICS saved = ROW_COUNT;
+    RETURN saved;
+END;
+$$ language 'plpgsql';
+
 -- =====================================================
 -- 13. COMPLETION MESSAGE
 -- =====================================================
@@ -12,6 +12,23 @@ CREATE INDEX IF NOT EXISTS idx_timetables_faculty_schedule
 CREATE INDEX IF NOT EXISTS idx_timetables_dept_section_schedule 
     ON timetables(department, section, day, time_slot);
 
+-- One draft and one finalized row per section cell; the key of the upsert that
+-- saves a regenerated section (TIMETABLE_SAVE_MODE=diff).
+CREATE UNIQUE INDEX IF NOT EXISTS unique_section_slot
+    ON timetables(department, academic_year, year, semester, section, day, time_slot, is_finalized);
+
+-- Rooms the generator books (see rooms.py); with no rows it uses Room-101..Room-140
+-- and Lab-1..Lab-10. Room bookings are read per academic year.
+CREATE TABLE IF NOT EXISTS rooms (
+    id BIGSERIAL PRIMARY KEY,
+    name VARCHAR(50) UNIQUE NOT NULL,
+    type VARCHAR(20) NOT NULL DEFAULT 'classroom' CHECK (type IN ('classroom', 'lab')),
+    capacity INTEGER CHECK (capacity >= 1),
+    department VARCHAR(10),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_timetables_year_room ON timetables(academic_year, room);
+
 -- Function to check faculty conflicts
 CREATE OR REPLACE FUNCTION check_faculty_conflict(
     p_faculty_name TEXT,
@@ -49,4 +66,43 @@ BEGIN
         AND academic_year = p_academic_year
     );
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
+
+-- Function to replace the finalized timetable of one department/year/semester in
+-- a single transaction: either every row of p_rows is saved or nothing changes.
+CREATE OR REPLACE FUNCTION finalize_timetable(
+    p_department TEXT,
+    p_academic_year TEXT,
+    p_year INTEGER,
+    p_semester INTEGER,
+    p_rows JSONB
+) RETURNS INTEGER AS $$
+DECLARE
+    saved INTEGER;
+BEGIN
+    DELETE FROM timetables
+    WHERE department = p_department
+    AND academic_year = p_academic_year
+    AND year = p_year
+    AND semester = p_semester
+    AND is_finalized = true;
+
+    INSERT INTO timetables (
+        department, section, day, time_slot, subject_name, subject_code,
+        faculty_name, faculty_department, room, type, academic_year, year,
+        semester, is_cross_dept, teaching_dept, is_finalized
+    )
+    SELECT p_department, r.section, r.day, r.time_slot, r.subject_name, r.subject_code,
+           r.faculty_name, COALESCE(r.faculty_department, p_department), r.room, r.type,
+           p_academic_year, p_year, p_semester, COALESCE(r.is_cross_dept, false),
+           r.teaching_dept, true
+    FROM jsonb_to_recordset(p_rows) AS r(
+        section TEXT, day TEXT, time_slot INTEGER, subject_name TEXT, subject_code TEXT,
+        faculty_name TEXT, faculty_department TEXT, room TEXT, type TEXT,
+        is_cross_dept BOOLEAN, teaching_dept TEXT
+    );
+
+    GET DIAGNOSTICS saved = ROW_COUNT;
+    RETURN saved;
+END;
+$$ LANGUAGE plpgsql;
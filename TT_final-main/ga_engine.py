@@ -0,0 +1,150 @@
+import sys
+import time
+import random
+from typing import List, Dict, Any, Optional
+
+from placement_problem import PlacementProblem, PlacementState, Position
+from solver_progress import SolveProgress
+
+
+class GeneticPlacementEngine:
+    """Population-based search over section placements.
+
+    A chromosome is the list of positions (one gene per session of the placement
+    queue). Children inherit whole days from one parent or the other, so lab pairs
+    are never split, and every decoded child is repaired by re-placing the sessions
+    that no longer fit. Search stops at the generation or time budget, or as soon as
+    a complete timetable with no soft penalties is found.
+    """
+
+    def __init__(self, problem: PlacementProblem, population_size: int = 30, generations: int = 150,
+                 time_limit: float = 10.0, tournament_size: int = 3, crossover_rate: float = 0.9,
+                 mutation_rate: float = 0.3, elite_count: int = 2, seed: Optional[int] = None,
+                 initial: Optional[List[PlacementState]] = None, progress: Optional[SolveProgress] = None):
+        self.problem = problem
+        self.population_size = max(2, int(population_size))
+        self.generations = max(1, int(generations))
+        self.time_limit = float(time_limit)
+        self.tournament_size = max(1, int(tournament_size))
+        self.crossover_rate = float(crossover_rate)
+        self.mutation_rate = float(mutation_rate)
+        self.elite_count = min(max(0, int(elite_count)), self.population_size)
+        self.rng = random.Random(seed)
+        self.initial = initial or []
+        self.progress = progress
+        self.generations_run = 0
+        # Final population of the last run(), kept for island migration.
+        self.population: List[PlacementState] = []
+        self.costs: List[int] = []
+
+    @classmethod
+    def from_options(cls, problem: PlacementProblem, options: Optional[Dict[str, Any]] = None,
+                     initial: Optional[List[PlacementState]] = None,
+                     progress: Optional[SolveProgress] = None) -> 'GeneticPlacementEngine':
+        options = options or {}
+        allowed = ('population_size', 'generations', 'time_limit', 'tournament_size',
+                   'crossover_rate', 'mutation_rate', 'elite_count', 'seed')
+        kwargs = {k: options[k] for k in allowed if options.get(k) is not None}
+        return cls(problem, initial=initial, progress=progress, **kwargs)
+
+    def decode(self, genes: List[Optional[Position]]) -> PlacementState:
+        state = self.problem.new_state()
+        for idx, pos in enumerate(genes):
+            if pos is not None and state.can_place(idx, pos):
+                state.place(idx, pos)
+        pending = state.unplaced()
+        self.rng.shuffle(pending)
+        state.fill_randomly(self.rng, pending)
+        return state
+
+    def random_individual(self) -> PlacementState:
+        state = self.problem.new_state()
+        order = list(range(len(self.problem.sessions)))
+        self.rng.shuffle(order)
+        # Labs have the fewest candidate positions, so give them first pick.
+        order.sort(key=lambda i: not self.problem.session_is_lab[i])
+        state.fill_randomly(self.rng, order)
+        return state
+
+    def tournament(self, population: List[PlacementState], costs: List[int]) -> PlacementState:
+        picks = self.rng.sample(range(len(population)), min(self.tournament_size, len(population)))
+        return population[min(picks, key=lambda i: costs[i])]
+
+    def crossover(self, a: PlacementState, b: PlacementState) -> PlacementState:
+        from_a = [self.rng.random() < 0.5 for _ in range(self.problem.n_days)]
+        genes: List[Optional[Position]] = []
+        for pa, pb in zip(a.positions, b.positions):
+            take_a = pa is not None and from_a[pa[0]]
+            take_b = pb is not None and not from_a[pb[0]]
+            if take_a and take_b:
+                genes.append(pa if self.rng.random() < 0.5 else pb)
+            elif take_a:
+                genes.append(pa)
+            elif take_b:
+                genes.append(pb)
+            else:
+                genes.append(None)
+        return self.decode(genes)
+
+    def mutate(self, state: PlacementState) -> None:
+        sessions = self.problem.sessions
+        placed = [i for i, pos in enumerate(state.positions) if pos is not None]
+        if not placed:
+            return
+        idx = self.rng.choice(placed)
+        if self.rng.random() < 0.5:
+            # Move: lift one session and re-place it somewhere it still fits.
+            old = state.remove(idx)
+            options = [p for p in state.feasible_positions(idx) if p != old]
+            state.place(idx, self.rng.choice(options) if options else old)
+        else:
+            # Swap: exchange positions with a session of the same length.
+            periods = sessions[idx].periods
+            partners = [j for j in placed if j != idx and sessions[j].periods == periods]
+            if not partners:
+                return
+            other = self.rng.choice(partners)
+            pos_i, pos_j = state.remove(idx), state.remove(other)
+            if state.can_place(idx, pos_j):
+                state.place(idx, pos_j)
+                if state.can_place(other, pos_i):
+                    state.place(other, pos_i)
+                    return
+                state.remove(idx)
+            state.place(idx, pos_i)
+            state.place(other, pos_j)
+        state.fill_randomly(self.rng)
+
+    def run(self) -> PlacementState:
+        started = time.monotonic()
+        population = [s.copy() for s in self.initial][:self.population_size]
+        while len(population) < self.population_size:
+            population.append(self.random_individual())
+        costs = [s.penalty() for s in population]
+
+        for generation in range(self.generations):
+            self.generations_run = generation + 1
+            if min(costs) == 0 or time.monotonic() - started > self.time_limit:
+                break
+            ranked = sorted(range(len(population)), key=lambda i: costs[i])
+            next_population = [population[i].copy() for i in ranked[:self.elite_count]]
+            while len(next_population) < self.population_size:
+                parent_a = self.tournament(population, costs)
+                if self.rng.random() < self.crossover_rate:
+                    child = self.crossover(parent_a, self.tournament(population, costs))
+                else:
+                    child = parent_a.copy()
+                if self.rng.random() < self.mutation_rate:
+                    self.mutate(child)
+                next_population.append(child)
+            population = next_population
+            costs = [s.penalty() for s in population]
+            if self.progress is not None and self.progress.due():
+                best = population[min(range(len(population)), key=lambda i: costs[i])]
+                self.progress.state('ga', best, generation=self.generations_run)
+
+        self.population, self.costs = population, costs
+        best = min(range(len(population)), key=lambda i: costs[i])
+        print(f"GA finished after {self.generations_run} generations in {time.monotonic() - started:.2f}s, "
+              f"best penalty {costs[best]}", file=sys.stderr)
+        return population[best]
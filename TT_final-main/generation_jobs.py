@@ -0,0 +1,163 @@
+import sys
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    """One background run. status: queued -> running -> done | failed | cancelled.
+
+    The job function reports progress with publish(); readers follow the event
+    log with wait_events(), so any number of clients can stream one run.
+    """
+
+    def __init__(self, key: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+        self.events: List[Dict[str, Any]] = []
+        self._cancel = threading.Event()
+        self._changed = threading.Condition()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running')
+
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        """Cancellation point for the job function."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Append a progress event; also a cancellation point."""
+        self.raise_if_cancelled()
+        with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    def wait_events(self, start: int, timeout: float) -> Tuple[List[Dict[str, Any]], bool]:
+        """Events from index start on, waiting up to timeout for one; (events, job finished)."""
+        with self._changed:
+            if len(self.events) <= start and self.active:
+                self._changed.wait(timeout)
+            return self.events[start:], not self.active
+
+    def _notify(self) -> None:
+        with self._changed:
+            self._changed.notify_all()
+
+    def to_dict(self, include_result: bool = False) -> Dict[str, Any]:
+        out = {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'cancel_requested': self._cancel.is_set()
+        }
+        if self.error is not None:
+            out['error'] = self.error
+        if include_result and self.status == 'done':
+            out['result'] = self.result
+        return out
+
+
+class JobManager:
+    """Bounded background runner with de-duplication of identical submissions.
+
+    Jobs run on max_workers threads; at most max_pending jobs may be queued or
+    running at once. A submission whose key matches a queued or running job
+    returns that job. Finished jobs stay readable for `retention` seconds.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32, retention: float = 3600.0):
+        self.max_pending = max(1, int(max_pending))
+        self.retention = float(retention)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix='job')
+        self._jobs: Dict[str, Job] = {}
+        self._active_by_key: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, fn: Callable[[Job], Any]) -> Tuple[Job, bool]:
+        """Queue fn(job); returns (job, created). Raises QueueFull when max_pending is reached."""
+        with self._lock:
+            self._prune()
+            existing = self._jobs.get(self._active_by_key.get(key, ''))
+            if existing is not None and existing.active:
+                return existing, False
+            if sum(1 for j in self._jobs.values() if j.active) >= self.max_pending:
+                raise QueueFull(f"Too many generation jobs in progress (limit {self.max_pending})")
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._active_by_key[key] = job.id
+            job.future = self._executor.submit(self._run, job, fn)
+            return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return job
+            job._cancel.set()
+            if job.status == 'queued' and job.future is not None and job.future.cancel():
+                self._finish(job, 'cancelled')
+            return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        with self._lock:
+            if job.cancel_requested():
+                self._finish(job, 'cancelled')
+                return
+            job.status = 'running'
+            job.started_at = time.time()
+        try:
+            result = fn(job)
+        except JobCancelled:
+            with self._lock:
+                self._finish(job, 'cancelled')
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}", file=sys.stderr)
+            with self._lock:
+                job.error = str(e)
+                self._finish(job, 'failed')
+        else:
+            with self._lock:
+                job.result = result
+                self._finish(job, 'done')
+
+    def _finish(self, job: Job, status: str) -> None:
+        # Caller holds the lock.
+        job.status = status
+        job.finished_at = time.time()
+        if self._active_by_key.get(job.key) == job.id:
+            del self._active_by_key[job.key]
+        job._notify()
+
+    def _prune(self) -> None:
+        # Caller holds the lock.
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if not j.active and (j.finished_at or 0) < cutoff]:
+            del self._jobs[job_id]
@@ -0,0 +1,129 @@
+import sys
+import time
+import random
+from typing import List, Dict, Any, Optional, Tuple
+
+from placement_problem import PlacementProblem, PlacementState, Position
+from ga_engine import GeneticPlacementEngine
+from solver_progress import SolveProgress
+from worker_pool import get_process_pool, in_worker_process, DEFAULT_WORKERS
+
+Genes = List[Optional[Position]]
+
+# GA settings forwarded to every island; the generation budget is split into epochs.
+ISLAND_GA_OPTIONS = ('population_size', 'tournament_size', 'crossover_rate', 'mutation_rate', 'elite_count')
+
+
+def _evolve_island(task: Dict[str, Any]) -> Tuple[List[Genes], List[int]]:
+    """Worker entry point: run one island for one epoch and return its final population."""
+    engine = GeneticPlacementEngine(task['problem'], generations=task['generations'],
+                                    time_limit=task['time_limit'], seed=task['seed'], **task['ga_options'])
+    engine.initial = [engine.decode(genes) for genes in task['population']]
+    engine.run()
+    return [s.positions for s in engine.population], engine.costs
+
+
+class IslandModelSearch:
+    """Independent GA populations ("islands") evolved side by side in the process pool.
+
+    Each island starts from its own seed. After every epoch of migration_interval
+    generations the best `migrants` individuals of each island replace the worst
+    of the next one (ring topology), which keeps islands diverse while still
+    sharing progress. The search ends when the generation or time budget runs out
+    or any island finds a complete timetable with no soft penalties.
+    """
+
+    def __init__(self, problem: PlacementProblem, islands: int = DEFAULT_WORKERS, generations: int = 150,
+                 migration_interval: int = 15, migrants: int = 2, time_limit: float = 10.0,
+                 seed: Optional[int] = None, ga_options: Optional[Dict[str, Any]] = None,
+                 initial: Optional[List[PlacementState]] = None, progress: Optional[SolveProgress] = None):
+        self.problem = problem
+        self.islands = max(1, int(islands))
+        self.generations = max(1, int(generations))
+        self.migration_interval = max(1, int(migration_interval))
+        self.migrants = max(0, int(migrants))
+        self.time_limit = float(time_limit)
+        self.rng = random.Random(seed)
+        self.ga_options = ga_options or {}
+        self.initial = initial or []
+        self.progress = progress
+        self.epochs_run = 0
+
+    @classmethod
+    def from_options(cls, problem: PlacementProblem, options: Optional[Dict[str, Any]] = None,
+                     initial: Optional[List[PlacementState]] = None,
+                     progress: Optional[SolveProgress] = None) -> 'IslandModelSearch':
+        options = options or {}
+        allowed = ('islands', 'generations', 'migration_interval', 'migrants', 'time_limit', 'seed')
+        kwargs = {k: options[k] for k in allowed if options.get(k) is not None}
+        ga_options = {k: options[k] for k in ISLAND_GA_OPTIONS if options.get(k) is not None}
+        return cls(problem, initial=initial, ga_options=ga_options, progress=progress, **kwargs)
+
+    def _run_epoch(self, tasks: List[Dict[str, Any]]) -> List[Tuple[List[Genes], List[int]]]:
+        # Nested pools are not allowed inside a worker (e.g. under ParallelSectionScheduler).
+        if self.islands == 1 or in_worker_process():
+            return [_evolve_island(task) for task in tasks]
+        futures = [get_process_pool().submit(_evolve_island, task) for task in tasks]
+        results = []
+        for task, fut in zip(tasks, futures):
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                print(f"Island worker failed, evolving in-process: {e}", file=sys.stderr)
+                results.append(_evolve_island(task))
+        return results
+
+    def _migrate(self, results: List[Tuple[List[Genes], List[int]]]) -> List[List[Genes]]:
+        ranked = [sorted(zip(costs, range(len(pop))), key=lambda c: c[0]) for pop, costs in results]
+        populations = [list(pop) for pop, _ in results]
+        for i, (pop, _) in enumerate(results):
+            target = (i + 1) % len(results)
+            if target == i:
+                break
+            best = [pop[j] for _, j in ranked[i][:self.migrants]]
+            worst = [j for _, j in ranked[target][::-1][:len(best)]]
+            for j, genes in zip(worst, best):
+                populations[target][j] = genes
+        return populations
+
+    def _state(self, genes: Genes) -> PlacementState:
+        state = self.problem.new_state()
+        for idx, pos in enumerate(genes):
+            if pos is not None and state.can_place(idx, pos):
+                state.place(idx, pos)
+        return state
+
+    def run(self) -> PlacementState:
+        started = time.monotonic()
+        seeded = [s.positions for s in self.initial]
+        populations: List[List[Genes]] = [list(seeded) for _ in range(self.islands)]
+        best_genes: Optional[Genes] = seeded[0] if seeded else None
+        best_cost = self.initial[0].penalty() if self.initial else None
+
+        remaining = self.generations
+        while remaining > 0:
+            elapsed = time.monotonic() - started
+            if best_cost == 0 or elapsed > self.time_limit:
+                break
+            generations = min(self.migration_interval, remaining)
+            remaining -= generations
+            tasks = [{
+                'problem': self.problem, 'population': populations[i], 'generations': generations,
+                'time_limit': self.time_limit - elapsed, 'seed': self.rng.getrandbits(32),
+                'ga_options': self.ga_options
+            } for i in range(self.islands)]
+            results = self._run_epoch(tasks)
+            self.epochs_run += 1
+
+            for pop, costs in results:
+                j = min(range(len(costs)), key=lambda k: costs[k])
+                if best_cost is None or costs[j] < best_cost:
+                    best_cost, best_genes = costs[j], pop[j]
+            populations = self._migrate(results)
+            if self.progress is not None and best_genes is not None:
+                placed = sum(1 for pos in best_genes if pos is not None)
+                self.progress.update('island', placed, len(best_genes), best_cost, epoch=self.epochs_run)
+
+        print(f"Island search finished after {self.epochs_run} epochs on {self.islands} islands in "
+              f"{time.monotonic() - started:.2f}s, best penalty {best_cost}", file=sys.stderr)
+        return self._state(best_genes) if best_genes is not None else self.problem.new_state()
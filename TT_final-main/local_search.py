@@ -0,0 +1,279 @@
+import sys
+import time
+import random
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+from placement_problem import PlacementProblem, PlacementState, Position
+from timetable_grid import EMPTY
+from solver_progress import SolveProgress
+
+# A move lifts some sessions and puts some (possibly the same) sessions at new positions.
+Move = Tuple[List[int], List[Tuple[int, Position]]]
+
+
+class LocalSearchRepair:
+    """Tabu search that completes a partial placement instead of starting over.
+
+    Neighbourhoods:
+      * eject  - put an unplaced session at one of its candidate positions and
+                 unplace whatever blocks it (its cells, or the same subject
+                 that day);
+      * swap   - exchange the positions of two sessions of the same length;
+      * kempe  - swap two days for the chain of sessions that would clash when
+                 one of them moves across, so the chain stays consistent.
+    Moves are costed by the change in unplaced sessions, in the day penalties of
+    the days they touch and in how many unplaced sessions have a feasible
+    position. Those are counted per session and day: a move only changes the
+    section, faculty and subject masks of the days it touches, so only those
+    days are recounted. A session lifted from a position may not return to it
+    for tabu_tenure iterations unless that beats the best cost found so far.
+    """
+
+    def __init__(self, problem: PlacementProblem, time_limit: float = 2.0, max_iterations: int = 20000,
+                 tabu_tenure: int = 10, samples: int = 20, max_chain: int = 12, seed: Optional[int] = None,
+                 progress: Optional[SolveProgress] = None):
+        self.problem = problem
+        self.time_limit = float(time_limit)
+        self.max_iterations = max(1, int(max_iterations))
+        self.tabu_tenure = max(1, int(tabu_tenure))
+        self.samples = max(1, int(samples))
+        self.max_chain = max(2, int(max_chain))
+        self.rng = random.Random(seed)
+        self.progress = progress
+        self.iterations = 0
+        self._tabu: Dict[Tuple[int, Position], int] = {}
+        # Feasible positions per day of every unplaced session, and the days with any.
+        self._counts: Dict[int, List[int]] = {}
+        self._open: Dict[int, int] = {}
+        # Candidate slot masks per session and day; every one is allowed by the problem.
+        self._by_day = [[[mask for _, mask in problem.positions_on_day(i, d)] for d in range(problem.n_days)]
+                        for i in range(len(problem.sessions))]
+        self._all_days = (1 << problem.n_days) - 1
+
+    @classmethod
+    def from_options(cls, problem: PlacementProblem, options: Optional[Dict[str, Any]] = None,
+                     progress: Optional[SolveProgress] = None) -> 'LocalSearchRepair':
+        options = options or {}
+        names = {'repair_time_limit': 'time_limit', 'repair_iterations': 'max_iterations',
+                 'tabu_tenure': 'tabu_tenure', 'seed': 'seed'}
+        kwargs = {arg: options[key] for key, arg in names.items() if options.get(key) is not None}
+        return cls(problem, progress=progress, **kwargs)
+
+    # -- neighbourhoods ------------------------------------------------------
+
+    def _blockers(self, state: PlacementState, idx: int, pos: Position) -> List[int]:
+        """Placed sessions that have to leave for idx to take pos."""
+        # Faculty clashes inside one section are cell clashes, so cells and the
+        # subject-per-day rule are all there is to check here.
+        problem = self.problem
+        day_i, mask = pos
+        tracked = problem.session_tracks[idx]
+        subject = problem.session_subject[idx]
+        out = []
+        for slot_i in range(problem.n_slots):
+            j = state.grid.get(day_i, slot_i)
+            if j == EMPTY or j == idx or j in out:
+                continue
+            if (mask & state.positions[j][1]
+                    or (tracked and problem.session_tracks[j] and problem.session_subject[j] == subject)):
+                out.append(j)
+        return out
+
+    def _eject_moves(self, state: PlacementState) -> List[Move]:
+        pending = state.unplaced()
+        if not pending:
+            return []
+        idx = self.rng.choice(pending)
+        return [(self._blockers(state, idx, pos), [(idx, pos)]) for pos in self.problem.candidate_positions(idx)]
+
+    def _swap_moves(self, state: PlacementState, placed: List[int]) -> List[Move]:
+        sessions = self.problem.sessions
+        moves = []
+        for _ in range(self.samples):
+            i, j = self.rng.sample(placed, 2)
+            pos_i, pos_j = state.positions[i], state.positions[j]
+            if sessions[i].periods == sessions[j].periods and pos_i != pos_j:
+                moves.append(([i, j], [(i, pos_j), (j, pos_i)]))
+        return moves
+
+    def _kempe_move(self, state: PlacementState, placed: List[int]) -> Optional[Move]:
+        start = self.rng.choice(placed)
+        first_day = state.positions[start][0]
+        other_day = self.rng.choice([d for d in range(self.problem.n_days) if d != first_day])
+        chain = [start]
+        seen = {start}
+        for k in chain:
+            day_i, mask = state.positions[k]
+            target = other_day if day_i == first_day else first_day
+            for j in self._blockers(state, k, (target, mask)):
+                if j not in seen:
+                    seen.add(j)
+                    chain.append(j)
+            if len(chain) > self.max_chain:
+                return None
+        swapped = [(k, (other_day if state.positions[k][0] == first_day else first_day, state.positions[k][1]))
+                   for k in chain]
+        return chain, swapped
+
+    # -- evaluation ----------------------------------------------------------
+
+    def _apply(self, state: PlacementState, move: Move) -> Optional[List[Tuple[int, Position]]]:
+        """Apply a move and return what it lifted, or leave state untouched and return None."""
+        removals, placements = move
+        lifted = [(j, state.remove(j)) for j in removals]
+        done = []
+        for j, pos in placements:
+            if not state.can_place(j, pos):
+                for k in done:
+                    state.remove(k)
+                for k, old in lifted:
+                    state.place(k, old)
+                return None
+            state.place(j, pos)
+            done.append(j)
+        return lifted
+
+    def _undo(self, state: PlacementState, move: Move, lifted: List[Tuple[int, Position]]) -> None:
+        for j, _ in move[1]:
+            state.remove(j)
+        for j, old in lifted:
+            state.place(j, old)
+
+    def _touched_days(self, state: PlacementState, move: Move) -> set:
+        days = {pos[0] for _, pos in move[1]}
+        days.update(state.positions[j][0] for j in move[0])
+        return days
+
+    def _day_count(self, state: PlacementState, idx: int, day_i: int) -> int:
+        """state.can_place over idx's candidates on day_i, as one mask test each."""
+        masks = self._by_day[idx][day_i]
+        if not masks or not state.day_allowed(idx, day_i):
+            return 0
+        busy = state.day_masks[day_i]
+        fid = self.problem.session_faculty[idx]
+        if fid >= 0:
+            busy |= state.faculty_masks[fid * self.problem.n_days + day_i]
+        return sum(1 for mask in masks if not busy & mask)
+
+    def _insertable(self, state: PlacementState, idx: int, days: int) -> bool:
+        """Whether unplaced idx has a feasible position on one of the days in the bitmask."""
+        return any(self._day_count(state, idx, d) for d in range(self.problem.n_days) if days >> d & 1)
+
+    def _track(self, state: PlacementState, days: Iterable[int]) -> None:
+        """Bring the per-day counts up to date after the masks of days changed."""
+        counts = {}
+        for j in state.unplaced():
+            row = self._counts.get(j)
+            if row is None:
+                row = [self._day_count(state, j, d) for d in range(self.problem.n_days)]
+            else:
+                row = list(row)
+                for d in days:
+                    row[d] = self._day_count(state, j, d)
+            counts[j] = row
+        self._counts = counts
+        self._open = {j: sum(1 << d for d, n in enumerate(row) if n) for j, row in counts.items()}
+
+    def _score(self, state: PlacementState, move: Move) -> Optional[Tuple[int, List[Tuple[int, Position]]]]:
+        """Delta cost of a move (negative is better), evaluated on the days it touches."""
+        problem = self.problem
+        days = self._touched_days(state, move)
+        before = 1000 * state.n_unplaced + sum(state.day_penalty(d) for d in days)
+        section_before = [state.day_masks[d] for d in days]
+        lifted = self._apply(state, move)
+        if lifted is None:
+            return None
+        after = 1000 * state.n_unplaced + sum(state.day_penalty(d) for d in days)
+
+        # Change in insertable sessions. Only the touched days' masks changed, so a
+        # session still open on another day stays insertable, and a closed one can
+        # only open where the section freed a cell, or where a moved session of the
+        # same faculty or subject left.
+        touched = sum(1 << d for d in days)
+        freed = sum(1 << d for d, mask in zip(days, section_before) if mask & ~state.day_masks[d])
+        moved = [j for j, _ in lifted]
+        faculties = {problem.session_faculty[j] for j in moved}
+        subjects = {problem.session_subject[j] for j in moved if problem.session_tracks[j]}
+        gained = 0
+        for j, open_days in self._open.items():
+            if state.positions[j] is not None:
+                gained -= open_days > 0
+            elif open_days:
+                if not open_days & ~touched:
+                    gained += self._insertable(state, j, touched) - 1
+            else:
+                shares = (problem.session_faculty[j] in faculties
+                          or (problem.session_tracks[j] and problem.session_subject[j] in subjects))
+                opened = touched if shares else freed
+                if opened:
+                    gained += self._insertable(state, j, opened)
+        for j, _ in lifted:
+            if j not in self._open and state.positions[j] is None:
+                gained += self._insertable(state, j, self._all_days)
+        self._undo(state, move, lifted)
+        return after - before - 1000 * gained, lifted
+
+    def _is_tabu(self, move: Move) -> bool:
+        return any(self._tabu.get((j, pos), 0) > self.iterations for j, pos in move[1])
+
+    def _insert_free(self, state: PlacementState) -> None:
+        pending = state.unplaced()
+        self.rng.shuffle(pending)
+        state.fill_randomly(self.rng, pending)
+
+    # -- driver --------------------------------------------------------------
+
+    def run(self, state: PlacementState) -> PlacementState:
+        started = time.monotonic()
+        state = state.copy()
+        start_unplaced = state.n_unplaced
+        self._insert_free(state)
+        self._counts, self._open = {}, {}
+        self._track(state, ())
+        cost = state.penalty()
+        best, best_cost = state.copy(), cost
+
+        while best.n_unplaced and self.iterations < self.max_iterations:
+            if time.monotonic() - started > self.time_limit:
+                break
+            self.iterations += 1
+            placed = [i for i, pos in enumerate(state.positions) if pos is not None]
+            moves = self._eject_moves(state)
+            if len(placed) > 1:
+                moves.extend(self._swap_moves(state, placed))
+                for _ in range(max(1, self.samples // 4)):
+                    kempe = self._kempe_move(state, placed)
+                    if kempe is not None:
+                        moves.append(kempe)
+
+            chosen, chosen_score = None, None
+            for move in moves:
+                scored = self._score(state, move)
+                if scored is None:
+                    continue
+                delta = scored[0]
+                if self._is_tabu(move) and cost + delta >= best_cost:
+                    continue
+                if chosen_score is None or delta < chosen_score or (delta == chosen_score and self.rng.random() < 0.5):
+                    chosen, chosen_score = move, delta
+            if chosen is None:
+                continue
+
+            previous = list(state.positions)
+            lifted = self._apply(state, chosen)
+            tenure = self.tabu_tenure + self.rng.randint(0, 2)
+            for j, old in lifted:
+                self._tabu[(j, old)] = self.iterations + tenure
+            self._insert_free(state)
+            self._track(state, {pos[0] for old, new in zip(previous, state.positions) if old != new
+                                for pos in (old, new) if pos is not None})
+            cost = state.penalty()
+            if cost < best_cost:
+                best, best_cost = state.copy(), cost
+            if self.progress is not None and self.progress.due():
+                self.progress.state('repair', best, iteration=self.iterations)
+
+        print(f"Repair placed {start_unplaced - best.n_unplaced} of {start_unplaced} remaining sessions "
+              f"in {self.iterations} iterations ({time.monotonic() - started:.2f}s), "
+              f"{best.n_unplaced} still unplaced", file=sys.stderr)
+        return best
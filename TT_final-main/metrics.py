@@ -0,0 +1,249 @@
+import math
+import time
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Prometheus text exposition format, version 0.0.4.
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+Labels = Dict[str, str]
+# (metric name, type, help, [(labels, value)])
+Family = Tuple[str, str, str, List[Tuple[Labels, float]]]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+class Metric(ABC):
+    """A labelled metric family; every label combination is kept in process memory."""
+
+    type = ''
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    @abstractmethod
+    def collect(self) -> List[Family]:
+        ...
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError('Counters only go up')
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> List[Family]:
+        with self._lock:
+            samples = [(dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+        return [(self.name, self.type, self.help, samples)]
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram with _bucket, _sum and _count series."""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the with-block (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def collect(self) -> List[Family]:
+        samples: List[Tuple[Labels, float]] = []
+        with self._lock:
+            items = [(key, list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()]
+        for key, counts, total, count in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                samples.append((dict(labels, le=_format_value(bound)), cumulative))
+            samples.append((dict(labels, le='+Inf'), count))
+        # _sum and _count follow the buckets, one pair per label set.
+        suffixed = [(f"{self.name}_bucket", samples)]
+        suffixed.append((f"{self.name}_sum", [(dict(zip(self.labelnames, key)), total) for key, _, total, _ in items]))
+        suffixed.append((f"{self.name}_count", [(dict(zip(self.labelnames, key)), count) for key, _, _, count in items]))
+        return [(name, self.type, self.help, s) for name, s in suffixed]
+
+
+class Registry:
+    """Metrics and collector callbacks rendered together by /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """collector() returns metric families computed at scrape time (e.g. cache stats)."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics:
+            families = metric.collect()
+            lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, _, _, samples in families:
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                lines.append(f"# collector error: {_escape(e)}")
+                continue
+            for name, typ, help, samples in families:
+                lines.append(f"# HELP {name} {_escape(help)}")
+                lines.append(f"# TYPE {name} {typ}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def histogram(name: str, help: str, labelnames: Iterable[str] = (),
+              buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# -- application metrics ---------------------------------------------------------
+# Counted per process: run several workers and Prometheus sums them per instance.
+# Solves running in the process pool (parallel /generate) only show up in the
+# section-level metrics, which are recorded back in the request process.
+
+HTTP_REQUESTS = counter('timetable_http_requests_total', 'HTTP requests by route, method and status',
+                        ('route', 'method', 'status'))
+HTTP_LATENCY = histogram('timetable_http_request_duration_seconds', 'HTTP request latency by route',
+                         ('route', 'method'))
+
+GENERATION_PHASE = histogram('timetable_generation_phase_seconds',
+                             'Time spent in each generation phase (fetch, subject_hours, conflict_check, '
+                             'placement, validation, save)', ('module', 'phase'))
+SECTIONS_GENERATED = counter('timetable_sections_generated_total', 'Sections generated, by engine and outcome',
+                             ('engine', 'valid'))
+PLACEMENT_ATTEMPTS = counter('timetable_placement_attempts_total',
+                             'Sessions the constructive pass tried to place', ('engine',))
+PLACEMENT_FAILURES = counter('timetable_placement_failures_total',
+                             'Sessions left unplaced after the constructive pass (stage=greedy) '
+                             'and after search and repair (stage=final)', ('engine', 'stage'))
+
+DB_REQUESTS = counter('timetable_db_requests_total', 'Database round trips by backend, table and operation',
+                      ('backend', 'table', 'operation'))
+DB_ERRORS = counter('timetable_db_errors_total', 'Failed database round trips by backend, table and operation',
+                    ('backend', 'table', 'operation'))
+DB_LATENCY = histogram('timetable_db_request_duration_seconds', 'Database round-trip latency',
+                       ('backend', 'operation'), buckets=DB_BUCKETS)
+
+
+@contextmanager
+def db_request(backend: str, table: str, operation: str) -> Iterator[None]:
+    """Count and time one database round trip."""
+    DB_REQUESTS.inc(backend=backend, table=table, operation=operation)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DB_ERRORS.inc(backend=backend, table=table, operation=operation)
+        raise
+    finally:
+        DB_LATENCY.observe(time.perf_counter() - started, backend=backend, operation=operation)
+
+
+def cache_collector(caches: Dict[str, Any]) -> Callable[[], List[Family]]:
+    """Scrape-time hits, misses, evictions and size of TTLCache instances by name."""
+    def collect() -> List[Family]:
+        stats = {name: cache.stats() for name, cache in caches.items()}
+        return [
+            ('timetable_cache_hits_total', 'counter', 'Cache hits',
+             [({'cache': name}, s['hits']) for name, s in stats.items()]),
+            ('timetable_cache_misses_total', 'counter', 'Cache misses',
+             [({'cache': name}, s['misses']) for name, s in stats.items()]),
+            ('timetable_cache_evictions_total', 'counter', 'Cache evictions',
+             [({'cache': name}, s['evictions']) for name, s in stats.items()]),
+            ('timetable_cache_entries', 'gauge', 'Entries held by the cache',
+             [({'cache': name}, s['size']) for name, s in stats.items()]),
+            ('timetable_cache_hit_ratio', 'gauge', 'Hits / lookups since start',
+             [({'cache': name}, s['hit_rate']) for name, s in stats.items()])
+        ]
+    return collect
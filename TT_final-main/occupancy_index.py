@@ -0,0 +1,90 @@
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Callable
+
+
+def section_filter(regenerating: Optional[Iterable[Tuple[Any, Any, Any, Any]]]) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """Row filter matching the draft rows of the (department, year, semester, section)
+    classes being regenerated; their saved drafts are replaced before anything else is saved."""
+    skipped = {tuple(str(v) for v in key) for key in regenerating or ()}
+    if not skipped:
+        return None
+    return lambda row: not row.get('is_finalized') and (str(row.get('department')), str(row.get('year')),
+                                                        str(row.get('semester')), str(row.get('section'))) in skipped
+
+
+class FacultyOccupancyIndex:
+    """College-wide faculty occupancy: one slot bitmask per (faculty, day).
+
+    Built once per generation request from a bulk read of the timetables table,
+    then consulted in memory by the placement loop instead of querying the
+    database for every candidate slot. A lab row is stored once, at the first
+    slot of its pair, and marks the faculty busy for the whole continuous pair.
+    """
+
+    def __init__(self, days: List[str], slot_ids: List[int], continuous_slots: Optional[List[List[int]]] = None):
+        self.days = list(days)
+        self.slot_ids = list(slot_ids)
+        self.continuous_slots = [list(pair) for pair in continuous_slots or ()]
+        self.day_index = {d: i for i, d in enumerate(self.days)}
+        self.slot_bits = {s: 1 << i for i, s in enumerate(self.slot_ids)}
+        # slot id -> bits of its continuous pair, for lab rows
+        self.pair_bits = {s: sum(self.slot_bits[p] for p in pair)
+                          for pair in self.continuous_slots for s in pair}
+        self.masks: Dict[Any, List[int]] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]], days: List[str], slot_ids: List[int],
+                  continuous_slots: Optional[List[List[int]]] = None,
+                  skip: Optional[Callable[[Dict[str, Any]], bool]] = None) -> 'FacultyOccupancyIndex':
+        index = cls(days, slot_ids, continuous_slots)
+        index.add_rows(rows, skip)
+        return index
+
+    def copy(self) -> 'FacultyOccupancyIndex':
+        clone = FacultyOccupancyIndex(self.days, self.slot_ids, self.continuous_slots)
+        clone.masks = {f: list(m) for f, m in self.masks.items()}
+        return clone
+
+    def add(self, faculty: Optional[str], day: Optional[str], slot: Any, session_type: Optional[str] = None) -> None:
+        if not faculty or faculty == 'N/A' or day not in self.day_index:
+            return
+        try:
+            slot = int(slot)
+        except (TypeError, ValueError):
+            return
+        bit = self.slot_bits.get(slot)
+        if bit is None:
+            return
+        if (session_type or '').lower() == 'lab':
+            bit = self.pair_bits.get(slot, bit)
+        days = self.masks.get(faculty)
+        if days is None:
+            days = self.masks[faculty] = [0] * len(self.days)
+        days[self.day_index[day]] |= bit
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]], skip: Optional[Callable[[Dict[str, Any]], bool]] = None) -> None:
+        for row in rows:
+            if skip is None or not skip(row):
+                self.add(row.get('faculty_name'), row.get('day'), row.get('time_slot'), row.get('type'))
+
+    def add_timetable(self, timetable: Dict[str, Dict[Any, Optional[Dict[str, Any]]]]) -> None:
+        """Reserve every cell of a {day: {slot: entry}} timetable."""
+        for day, day_data in timetable.items():
+            for slot_id, entry in day_data.items():
+                if entry:
+                    self.add(entry.get('faculty_name'), day, slot_id)
+
+    def mask(self, faculty: Optional[str], day: str) -> int:
+        days = self.masks.get(faculty)
+        if days is None or day not in self.day_index:
+            return 0
+        return days[self.day_index[day]]
+
+    def is_busy(self, faculty: Optional[str], day: str, slot: Any) -> bool:
+        return bool(self.mask(faculty, day) & self.slot_bits.get(slot, 0))
+
+    def busy_slots(self) -> Iterator[Tuple[str, str, int]]:
+        for faculty, days in self.masks.items():
+            for day_i, mask in enumerate(days):
+                for slot, bit in self.slot_bits.items():
+                    if mask & bit:
+                        yield faculty, self.days[day_i], slot
@@ -0,0 +1,238 @@
+import random
+from typing import List, Dict, Optional, Tuple
+
+from timetable_grid import TimetableGrid, SessionTable
+from occupancy_index import FacultyOccupancyIndex
+from session_records import SessionRecord
+from rooms import room_kind
+
+# A position is (day_index, slot_mask); bit i of the mask is slot index i, so a lab
+# covering a continuous pair is a single two-bit mask.
+Position = Tuple[int, int]
+
+
+def mask_slots(mask: int) -> List[int]:
+    """Slot indexes set in a bitmask, lowest first."""
+    out = []
+    i = 0
+    while mask:
+        if mask & 1:
+            out.append(i)
+        mask >>= 1
+        i += 1
+    return out
+
+
+class PlacementProblem:
+    """Static description of one section's placement task.
+
+    Holds the weekly sessions (interned SessionRecords), the day/slot grid, the
+    college-wide faculty occupancy index of slots taken elsewhere and, optionally,
+    room_open: per room type and day, the cells some usable room is still free for
+    (RoomAllocator.open_masks), so a lab is never placed where every lab is booked. Faculty and
+    subjects are mapped to dense integer ids and every occupancy question becomes a
+    bitmask test per (id, day). Candidate positions for every session are enumerated
+    once, so search engines only need to check what changes between candidates.
+    """
+
+    def __init__(self, sessions: List[SessionRecord], days: List[str], slot_ids: List[int],
+                 continuous_slots: List[List[int]], occupancy: Optional[FacultyOccupancyIndex] = None,
+                 room_open: Optional[Dict[str, List[int]]] = None):
+        self.sessions = sessions
+        self.room_open = room_open or {}
+        self.days = list(days)
+        self.slot_ids = list(slot_ids)
+        self.n_days = len(self.days)
+        self.n_slots = len(self.slot_ids)
+        self.day_index = {d: i for i, d in enumerate(self.days)}
+        self.slot_index = {s: i for i, s in enumerate(self.slot_ids)}
+        self.continuous_masks = [sum(1 << self.slot_index[s] for s in pair) for pair in continuous_slots]
+
+        # Dense per-problem ids, keyed by the records' interned faculty_id / subject_id.
+        self.faculty_ids: Dict[int, int] = {}
+        self.faculty_names: List[str] = []
+        self.subject_ids: Dict[int, int] = {}
+        self.session_faculty: List[int] = []
+        self.session_subject: List[int] = []
+        self.session_tracks: List[bool] = []
+        self.session_is_lab: List[bool] = []
+        for s in sessions:
+            if s.faculty_id >= 0:
+                if s.faculty_id not in self.faculty_ids:
+                    self.faculty_ids[s.faculty_id] = len(self.faculty_names)
+                    self.faculty_names.append(s.faculty_name)
+                self.session_faculty.append(self.faculty_ids[s.faculty_id])
+            else:
+                self.session_faculty.append(-1)
+            self.session_subject.append(self.subject_ids.setdefault(s.subject_id, len(self.subject_ids)))
+            # Theory and lab sessions of one subject may not share a day.
+            self.session_tracks.append(s.type in ('theory', 'lab'))
+            self.session_is_lab.append(s.type == 'lab')
+
+        self.busy_masks = [0] * (len(self.faculty_ids) * self.n_days)
+        if occupancy is not None:
+            same_layout = occupancy.slot_ids == self.slot_ids
+            for fid, faculty in enumerate(self.faculty_names):
+                for d, day in enumerate(self.days):
+                    if same_layout:
+                        mask = occupancy.mask(faculty, day)
+                    else:
+                        mask = sum(1 << i for i, s in enumerate(self.slot_ids) if occupancy.is_busy(faculty, day, s))
+                    self.busy_masks[fid * self.n_days + d] = mask
+
+        self._candidates = [self._enumerate_positions(i) for i in range(len(sessions))]
+        self._candidate_sets = [set(c) for c in self._candidates]
+
+    def _enumerate_positions(self, idx: int) -> List[Position]:
+        session = self.sessions[idx]
+        if self.session_is_lab[idx]:
+            masks = self.continuous_masks
+        elif session.subject_key == 'NSS' or session.type == 'free':
+            masks = [1 << (self.n_slots - 1)]
+        else:
+            masks = [1 << i for i in range(self.n_slots)]
+        fid = self.session_faculty[idx]
+        room_open = self.room_open.get(room_kind(session.type))
+        positions = []
+        for d in range(self.n_days):
+            busy = self.busy_masks[fid * self.n_days + d] if fid >= 0 else 0
+            if room_open is not None:
+                busy |= ~room_open[d]
+            positions.extend((d, m) for m in masks if not busy & m)
+        return positions
+
+    def candidate_positions(self, idx: int) -> List[Position]:
+        return self._candidates[idx]
+
+    def allows(self, idx: int, pos: Position) -> bool:
+        """True when pos has the right shape for the session and its faculty is not busy elsewhere."""
+        return pos in self._candidate_sets[idx]
+
+    def positions_on_day(self, idx: int, day_i: int) -> List[Position]:
+        return [pos for pos in self._candidates[idx] if pos[0] == day_i]
+
+    def describe(self, pos: Position) -> Tuple[str, List[int]]:
+        """Translate a position back to (day name, slot ids)."""
+        return self.days[pos[0]], [self.slot_ids[i] for i in mask_slots(pos[1])]
+
+    def new_state(self) -> 'PlacementState':
+        return PlacementState(self)
+
+    @property
+    def total_cells(self) -> int:
+        return self.n_days * self.n_slots
+
+
+class PlacementState:
+    """Mutable assignment of sessions to positions for one candidate timetable.
+
+    The grid holds session ids per cell; per-day bitmasks for the section, each
+    faculty and each subject answer feasibility checks without touching the grid.
+    """
+
+    def __init__(self, problem: PlacementProblem):
+        self.problem = problem
+        self.positions: List[Optional[Position]] = [None] * len(problem.sessions)
+        self.grid = TimetableGrid(problem.days, problem.slot_ids, sessions=SessionTable(problem.sessions))
+        self.day_masks = [0] * problem.n_days
+        self.faculty_masks = [0] * (len(problem.faculty_ids) * problem.n_days)
+        self.subject_days = [0] * len(problem.subject_ids)
+        self.labs_per_day = [0] * problem.n_days
+        self.n_unplaced = len(problem.sessions)
+
+    def copy(self) -> 'PlacementState':
+        clone = PlacementState.__new__(PlacementState)
+        clone.problem = self.problem
+        clone.positions = list(self.positions)
+        clone.grid = self.grid.copy()
+        clone.day_masks = list(self.day_masks)
+        clone.faculty_masks = list(self.faculty_masks)
+        clone.subject_days = list(self.subject_days)
+        clone.labs_per_day = list(self.labs_per_day)
+        clone.n_unplaced = self.n_unplaced
+        return clone
+
+    def day_allowed(self, idx: int, day_i: int) -> bool:
+        if not self.problem.session_tracks[idx]:
+            return True
+        return not (self.subject_days[self.problem.session_subject[idx]] >> day_i) & 1
+
+    def can_place(self, idx: int, pos: Position) -> bool:
+        day_i, mask = pos
+        if self.day_masks[day_i] & mask or not self.day_allowed(idx, day_i):
+            return False
+        if not self.problem.allows(idx, pos):
+            return False
+        fid = self.problem.session_faculty[idx]
+        return fid < 0 or not self.faculty_masks[fid * self.problem.n_days + day_i] & mask
+
+    def place(self, idx: int, pos: Position) -> None:
+        problem = self.problem
+        day_i, mask = pos
+        self.day_masks[day_i] |= mask
+        fid = problem.session_faculty[idx]
+        if fid >= 0:
+            self.faculty_masks[fid * problem.n_days + day_i] |= mask
+        if problem.session_tracks[idx]:
+            self.subject_days[problem.session_subject[idx]] |= 1 << day_i
+        if problem.session_is_lab[idx]:
+            self.labs_per_day[day_i] += 1
+        for slot_i in mask_slots(mask):
+            self.grid.set(day_i, slot_i, idx)
+        self.positions[idx] = pos
+        self.n_unplaced -= 1
+
+    def remove(self, idx: int) -> Optional[Position]:
+        pos = self.positions[idx]
+        if pos is None:
+            return None
+        problem = self.problem
+        day_i, mask = pos
+        self.day_masks[day_i] &= ~mask
+        fid = problem.session_faculty[idx]
+        if fid >= 0:
+            self.faculty_masks[fid * problem.n_days + day_i] &= ~mask
+        if problem.session_tracks[idx]:
+            self.subject_days[problem.session_subject[idx]] &= ~(1 << day_i)
+        if problem.session_is_lab[idx]:
+            self.labs_per_day[day_i] -= 1
+        for slot_i in mask_slots(mask):
+            self.grid.clear(day_i, slot_i)
+        self.positions[idx] = None
+        self.n_unplaced += 1
+        return pos
+
+    def feasible_positions(self, idx: int) -> List[Position]:
+        return [pos for pos in self.problem.candidate_positions(idx) if self.can_place(idx, pos)]
+
+    def unplaced(self) -> List[int]:
+        return [i for i, pos in enumerate(self.positions) if pos is None]
+
+    def empty_cells(self) -> int:
+        return self.problem.total_cells - sum(m.bit_count() for m in self.day_masks)
+
+    def penalty(self) -> int:
+        """Lower is better: unplaced sessions dominate, then soft preferences.
+
+        Soft terms keep each section to one lab per day and push free periods to the
+        end of the day instead of leaving gaps between classes.
+        """
+        return 1000 * self.n_unplaced + sum(self.day_penalty(d) for d in range(self.problem.n_days))
+
+    def day_penalty(self, day_i: int) -> int:
+        """Soft part of penalty() for one day, so moves can be costed by the days they touch."""
+        mask = self.day_masks[day_i]
+        first_free = ~mask & (mask + 1)
+        cost = (mask & ~((first_free << 1) - 1)).bit_count()
+        labs = self.labs_per_day[day_i]
+        return cost + 10 * (labs - 1) if labs > 1 else cost
+
+    def fill_randomly(self, rng: random.Random, order: Optional[List[int]] = None) -> None:
+        """Place every unplaced session at a random feasible position, if one exists."""
+        pending = order if order is not None else self.unplaced()
+        for idx in pending:
+            if self.positions[idx] is not None:
+                continue
+            options = self.feasible_positions(idx)
+            if options:
+                self.place(idx, rng.choice(options))
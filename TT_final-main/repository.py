@@ -0,0 +1,710 @@
+import os
+import re
+import sys
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+
+from supabase_queries import (fetch_all_pages, iter_pages, chunked, count_query, IN_CHUNK_SIZE, PAGE_SIZE,
+                              TIMETABLE_CONFLICT_COLUMNS, ROOM_BOOKING_COLUMNS)
+from metrics import db_request
+
+# TIMETABLE_BACKEND=supabase (default) talks to the hosted database; sqlite uses a
+# local replica at TIMETABLE_SQLITE_PATH (see `python repository.py replicate`).
+BACKEND = os.getenv('TIMETABLE_BACKEND', 'supabase').lower()
+SQLITE_PATH = os.getenv('TIMETABLE_SQLITE_PATH', 'timetable.db')
+
+# PostgREST / Postgres codes for "function does not exist".
+MISSING_FUNCTION_CODES = ('PGRST202', '42883')
+# Postgres code for an ON CONFLICT target without a matching unique index.
+MISSING_CONFLICT_TARGET_CODE = '42P10'
+
+TABLES = ('departments', 'subjects', 'faculty', 'timetables', 'faculty_assignments', 'rooms')
+
+# TIMETABLE_SAVE_MODE=diff (default) saves a regenerated section by writing only the
+# cells that changed (sync_section_timetable); replace deletes and re-inserts it.
+SAVE_MODE = os.getenv('TIMETABLE_SAVE_MODE', 'diff').lower()
+
+# Unique key of a timetables row (index unique_section_slot): one draft and one
+# finalized row per section cell.
+SECTION_SLOT_KEY = ('department', 'academic_year', 'year', 'semester', 'section', 'day', 'time_slot', 'is_finalized')
+
+Filters = Dict[str, Any]
+
+
+class TimetableRepository(ABC):
+    """Storage for subjects, faculty, timetables, faculty_assignments, departments and rooms.
+
+    Backends implement the primitives (select, count, insert, upsert, delete,
+    finalize_timetable, faculty_has_conflict); the entity methods are written
+    once on top of them, so every backend answers with the same rows.
+    Filters are {column: value} equality tests; in_filters are {column: values}.
+    """
+
+    backend = ''
+
+    # -- primitives ------------------------------------------------------------
+
+    @abstractmethod
+    def select(self, table: str, columns: str = '*', filters: Optional[Filters] = None,
+               in_filters: Optional[Dict[str, Iterable[Any]]] = None, order: Optional[str] = None,
+               desc: bool = False, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        ...
+
+    def select_pages(self, table: str, columns: str = '*', filters: Optional[Filters] = None,
+                     page_size: int = PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """select() ordered by id, yielded page_size rows at a time, for scans that do not
+        need every row in memory at once."""
+        rows = self.select(table, columns, filters, order='id')
+        for start in range(0, len(rows), page_size):
+            yield rows[start:start + page_size]
+
+    @abstractmethod
+    def count(self, table: str, filters: Optional[Filters] = None) -> int:
+        ...
+
+    @abstractmethod
+    def insert(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def upsert(self, table: str, rows: List[Dict[str, Any]], on_conflict: Iterable[str]) -> List[Dict[str, Any]]:
+        """Insert rows; a row whose on_conflict columns (a unique key) match an existing row updates it."""
+
+    @abstractmethod
+    def delete(self, table: str, filters: Filters,
+               in_filters: Optional[Dict[str, Iterable[Any]]] = None) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def finalize_timetable(self, department: str, academic_year: str, year: Any, semester: Any,
+                           rows: List[Dict[str, Any]]) -> None:
+        """Replace the finalized rows of one department/year/semester atomically."""
+
+    @abstractmethod
+    def faculty_has_conflict(self, faculty_name: str, day: str, time_slot: Any, academic_year: str) -> bool:
+        """True when the faculty already holds that slot in a finalized timetable."""
+
+    def ping(self) -> None:
+        self.count('subjects')
+
+    # -- entities ----------------------------------------------------------------
+
+    def subjects(self, department: Optional[str] = None, academic_year: Optional[str] = None,
+                 columns: str = '*', **filters: Any) -> List[Dict[str, Any]]:
+        scope = _scope(department=department, academic_year=academic_year, **filters)
+        return self.select('subjects', columns, scope)
+
+    def subject_fingerprint(self, department: Optional[str] = None,
+                            academic_year: Optional[str] = None) -> Tuple[int, Any]:
+        """(row count, latest updated_at) of a subject scope, to revalidate cached catalogs."""
+        scope = _scope(department=department, academic_year=academic_year)
+        latest = self.select('subjects', 'updated_at', scope, order='updated_at', desc=True, limit=1)
+        return self.count('subjects', scope), latest[0].get('updated_at') if latest else None
+
+    def faculty(self, department: Optional[str] = None, columns: str = '*') -> List[Dict[str, Any]]:
+        return self.select('faculty', columns, _scope(department=department), order='id')
+
+    def faculty_by_names(self, names: Iterable[str], columns: str = 'id,name,department') -> List[Dict[str, Any]]:
+        """Faculty rows for the given names (any department)."""
+        wanted = sorted({n for n in names if n and n != 'N/A'})
+        if not wanted:
+            return []
+        return self.select('faculty', columns, in_filters={'name': wanted}, order='id')
+
+    def departments(self) -> List[Dict[str, Any]]:
+        return self.select('departments', order='name')
+
+    def timetables(self, columns: str = '*', **filters: Any) -> List[Dict[str, Any]]:
+        return self.select('timetables', columns, filters)
+
+    def rooms(self, columns: str = '*') -> List[Dict[str, Any]]:
+        return self.select('rooms', columns, order='id')
+
+    def room_rows(self, academic_year: Optional[str] = None, rooms: Optional[Iterable[str]] = None,
+                  columns: str = ROOM_BOOKING_COLUMNS) -> List[Dict[str, Any]]:
+        """Timetable rows booking the given rooms (every room when None) in academic_year."""
+        scope = _scope(academic_year=academic_year)
+        if rooms is None:
+            return self.select('timetables', columns, scope, order='id')
+        names = sorted({r for r in rooms if r and r != 'N/A'})
+        return self.select('timetables', columns, scope, in_filters={'room': names}, order='id') if names else []
+
+    def timetable_rows(self, academic_year: Optional[str] = None, faculty_names: Optional[Iterable[str]] = None,
+                       departments: Optional[Iterable[str]] = None, columns: str = TIMETABLE_CONFLICT_COLUMNS,
+                       finalized: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Read the timetable rows a generation request can collide with.
+
+        Rows are limited to academic_year (when given) and, when faculty_names is
+        given, to those faculty plus every row of the listed departments (a row can
+        then appear twice, which is harmless for busy checks). finalized limits rows
+        to finalized (True) or draft (False) entries.
+        """
+        scope = _scope(academic_year=academic_year, is_finalized=finalized)
+        if faculty_names is None:
+            return self.select('timetables', columns, scope, order='id')
+        names = sorted({n for n in faculty_names if n and n != 'N/A'})
+        rows = self.select('timetables', columns, scope, in_filters={'faculty_name': names}, order='id') if names else []
+        depts = sorted({d for d in departments or () if d})
+        if depts:
+            rows.extend(self.select('timetables', columns, scope, in_filters={'department': depts}, order='id'))
+        return rows
+
+    def timetable_pages(self, academic_year: str, finalized: Optional[bool] = True,
+                        columns: str = '*') -> Iterator[List[Dict[str, Any]]]:
+        """Every timetables row of academic_year (finalized / draft / both for None), in pages."""
+        return self.select_pages('timetables', columns, _scope(academic_year=academic_year, is_finalized=finalized))
+
+    def replace_section_timetable(self, department: str, section: str, academic_year: str, year: int,
+                                  semester: int, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Swap one section's saved timetable for rows; returns (deleted, inserted)."""
+        deleted = self.delete('timetables', {'department': department, 'section': section,
+                                             'academic_year': academic_year, 'year': int(year),
+                                             'semester': int(semester)})
+        inserted = self.insert('timetables', rows) if rows else []
+        return len(deleted), len(inserted)
+
+    def delete_section_drafts(self, department: str, sections: Iterable[str], academic_year: str, year: int,
+                              semester: int) -> int:
+        """Delete the draft rows of several sections of one class year; returns how many."""
+        names = sorted({str(s) for s in sections})
+        if not names:
+            return 0
+        scope = _scope(department=department, academic_year=academic_year, year=int(year),
+                       semester=int(semester), is_finalized=False)
+        return len(self.delete('timetables', scope, in_filters={'section': names}))
+
+    def sync_section_timetable(self, department: str, section: str, academic_year: str, year: int,
+                               semester: int, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Make one section's saved timetable equal to rows (saved as drafts), writing
+        only the difference: stale cells are deleted by id and new or changed cells
+        go out as one upsert on SECTION_SLOT_KEY. Returns (deleted, upserted)."""
+        rows = [dict(row, is_finalized=False) for row in rows]
+        current = self.select('timetables', _delta_columns(rows),
+                              _section_scope(department, section, academic_year, year, semester), order='id')
+        stale, changed = section_delta(current, rows)
+        if stale:
+            self.delete('timetables', {}, in_filters={'id': stale})
+        if changed:
+            self.upsert('timetables', changed, SECTION_SLOT_KEY)
+        return len(stale), len(changed)
+
+    def replace_assignments(self, academic_year: str, rows: List[Dict[str, Any]]) -> int:
+        """Replace every faculty assignment of academic_year."""
+        self.delete('faculty_assignments', {'academic_year': academic_year})
+        return len(self.insert('faculty_assignments', rows)) if rows else 0
+
+
+def _scope(**filters: Any) -> Filters:
+    """Equality filters without the unset (None / empty) ones."""
+    return {k: v for k, v in filters.items() if v is not None and v != ''}
+
+
+def _section_scope(department: str, section: str, academic_year: Optional[str],
+                   year: Optional[int], semester: Optional[int]) -> Filters:
+    return _scope(department=department, section=section, academic_year=academic_year,
+                  year=int(year) if year is not None else None,
+                  semester=int(semester) if semester is not None else None)
+
+
+def _delta_columns(rows: List[Dict[str, Any]]) -> str:
+    columns = ['id'] + list(SECTION_SLOT_KEY)
+    for row in rows:
+        columns.extend(c for c in row if c not in columns)
+    return ','.join(columns)
+
+
+def section_delta(current: List[Dict[str, Any]], rows: List[Dict[str, Any]]) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    """(ids of current rows to delete, rows to upsert) that turn current into rows.
+
+    Rows are matched on SECTION_SLOT_KEY; a wanted row equal to its current row
+    in every column it sets is left alone. Current rows without a wanted
+    counterpart, and duplicates of one key, are deleted.
+    """
+    wanted = {tuple(row.get(c) for c in SECTION_SLOT_KEY): row for row in rows}
+    stale: List[Any] = []
+    kept: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    for row in current:
+        key = tuple(row.get(c) for c in SECTION_SLOT_KEY)
+        if key in wanted and key not in kept:
+            kept[key] = row
+        else:
+            stale.append(row['id'])
+    changed = [row for key, row in wanted.items()
+               if key not in kept or any(kept[key].get(c) != v for c, v in row.items())]
+    return stale, changed
+
+
+class SupabaseRepository(TimetableRepository):
+    """Repository over the Supabase (PostgREST) client; selects are paged and in_()
+    lists are chunked, so large reads stay within URL and page limits."""
+
+    backend = 'supabase'
+
+    def __init__(self, client):
+        self.client = client
+
+    def _execute(self, table: str, operation: str, query):
+        """Every request goes through here so /metrics counts round trips per table."""
+        with db_request(self.backend, table, operation):
+            return query.execute()
+
+    def _filtered(self, query, filters: Optional[Filters]):
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        return query
+
+    def select(self, table, columns='*', filters=None, in_filters=None, order=None, desc=False, limit=None):
+        def make_query(extra: Optional[Tuple[str, List[Any]]] = None):
+            q = self._filtered(self.client.table(table).select(columns), filters)
+            if extra is not None:
+                q = q.in_(*extra)
+            # Paging with range() needs a stable order.
+            return q.order(order, desc=desc) if order else q.order('id')
+
+        in_items = list((in_filters or {}).items())
+        if len(in_items) > 1:
+            raise ValueError('SupabaseRepository.select supports one in_ filter')
+        execute = lambda query: self._execute(table, 'select', query)
+        if limit is not None:
+            return execute(make_query(in_items[0] if in_items else None).limit(limit)).data or []
+        if not in_items:
+            return fetch_all_pages(make_query, execute=execute)
+        column, values = in_items[0]
+        rows: List[Dict[str, Any]] = []
+        for chunk in chunked(list(values), IN_CHUNK_SIZE):
+            rows.extend(fetch_all_pages(lambda chunk=chunk: make_query((column, chunk)), execute=execute))
+        return rows
+
+    def select_pages(self, table, columns='*', filters=None, page_size=PAGE_SIZE):
+        make_query = lambda: self._filtered(self.client.table(table).select(columns), filters).order('id')
+        return iter_pages(make_query, page_size, execute=lambda query: self._execute(table, 'select', query))
+
+    def count(self, table, filters=None):
+        return self._execute(table, 'count', count_query(self.client, table, filters)).count or 0
+
+    def subject_fingerprint(self, department=None, academic_year=None):
+        # Count and newest row in one request.
+        q = self._filtered(self.client.table('subjects').select('updated_at', count='exact'),
+                           _scope(department=department, academic_year=academic_year))
+        resp = self._execute('subjects', 'count', q.order('updated_at', desc=True).limit(1))
+        return resp.count, resp.data[0].get('updated_at') if resp.data else None
+
+    def insert(self, table, rows):
+        return self._execute(table, 'insert', self.client.table(table).insert(rows)).data or []
+
+    def upsert(self, table, rows, on_conflict):
+        query = self.client.table(table).upsert(rows, on_conflict=','.join(on_conflict))
+        return self._execute(table, 'upsert', query).data or []
+
+    def delete(self, table, filters, in_filters=None):
+        make_query = lambda: self._filtered(self.client.table(table).delete(), filters)
+        in_items = list((in_filters or {}).items())
+        if len(in_items) > 1:
+            raise ValueError('SupabaseRepository.delete supports one in_ filter')
+        if not in_items:
+            return self._execute(table, 'delete', make_query()).data or []
+        column, values = in_items[0]
+        rows: List[Dict[str, Any]] = []
+        for chunk in chunked(list(values), IN_CHUNK_SIZE):
+            rows.extend(self._execute(table, 'delete', make_query().in_(column, chunk)).data or [])
+        return rows
+
+    def sync_section_timetable(self, department, section, academic_year, year, semester, rows):
+        from postgrest.exceptions import APIError
+        try:
+            return super().sync_section_timetable(department, section, academic_year, year, semester, rows)
+        except APIError as e:
+            if e.code != MISSING_CONFLICT_TARGET_CODE:
+                raise
+            # unique_section_slot not created yet (enhanced_timetable_schema.sql).
+            print(f"unique_section_slot index missing, replacing the section instead: {e}", file=sys.stderr)
+            return self.replace_section_timetable(department, section, academic_year, year, semester, rows)
+
+    def finalize_timetable(self, department, academic_year, year, semester, rows):
+        from postgrest.exceptions import APIError
+        try:
+            # One call to the finalize_timetable database function (enhanced_timetable_schema.sql).
+            self._execute('finalize_timetable', 'rpc', self.client.rpc('finalize_timetable', {
+                'p_department': department,
+                'p_academic_year': academic_year,
+                'p_year': year,
+                'p_semester': semester,
+                'p_rows': rows
+            }))
+        except APIError as e:
+            if e.code not in MISSING_FUNCTION_CODES:
+                raise
+            # Database function not installed: delete, then one batched insert; put the
+            # old rows back if the insert fails so a finalize never half-applies.
+            print(f"finalize_timetable function unavailable, using batched insert: {e}", file=sys.stderr)
+            scope = {'department': department, 'academic_year': academic_year, 'year': year,
+                     'semester': semester, 'is_finalized': True}
+            deleted = self.delete('timetables', scope)
+            try:
+                if rows:
+                    self.insert('timetables', [dict(row, **scope) for row in rows])
+            except Exception:
+                if deleted:
+                    self.insert('timetables', deleted)
+                raise
+
+    def faculty_has_conflict(self, faculty_name, day, time_slot, academic_year):
+        resp = self._execute('check_faculty_conflict', 'rpc', self.client.rpc('check_faculty_conflict', {
+            'p_faculty_name': faculty_name,
+            'p_day': day,
+            'p_time_slot': time_slot,
+            'p_academic_year': academic_year
+        }))
+        return resp.data if resp.data else False
+
+
+# complete_database_setup.sql translated to SQLite, plus the timetable indexes of
+# enhanced_timetable_schema.sql and one for the academic-year scoped occupancy reads.
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS departments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    code TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS subjects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    department TEXT NOT NULL,
+    academic_year TEXT NOT NULL,
+    year INTEGER NOT NULL CHECK (year >= 1 AND year <= 4),
+    semester INTEGER NOT NULL CHECK (semester >= 1 AND semester <= 8),
+    sub_code TEXT,
+    name TEXT NOT NULL,
+    credits INTEGER NOT NULL DEFAULT 1 CHECK (credits >= 1 AND credits <= 6),
+    type TEXT NOT NULL DEFAULT 'theory' CHECK (type IN ('theory', 'lab', 'free')),
+    weekly_hours INTEGER NOT NULL DEFAULT 3 CHECK (weekly_hours >= 1 AND weekly_hours <= 10),
+    classes_per_week INTEGER,
+    is_cross_dept INTEGER DEFAULT 0,
+    teaching_dept TEXT DEFAULT NULL,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    CONSTRAINT unique_subject_per_semester UNIQUE (department, academic_year, year, semester, name)
+);
+
+CREATE TABLE IF NOT EXISTS faculty (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    department TEXT NOT NULL,
+    name TEXT NOT NULL,
+    initials TEXT NOT NULL,
+    designation TEXT NOT NULL DEFAULT 'assistant_professor',
+    email TEXT,
+    phone TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    CONSTRAINT unique_faculty_initials_per_dept UNIQUE (department, initials)
+);
+
+CREATE TABLE IF NOT EXISTS timetables (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    faculty_name TEXT NOT NULL,
+    faculty_department TEXT NOT NULL,
+    subject_code TEXT NOT NULL,
+    subject_name TEXT NOT NULL,
+    day TEXT NOT NULL CHECK (day IN ('Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday')),
+    time_slot INTEGER NOT NULL CHECK (time_slot >= 1 AND time_slot <= 6),
+    section TEXT NOT NULL,
+    room TEXT,
+    department TEXT NOT NULL,
+    academic_year TEXT NOT NULL,
+    semester INTEGER NOT NULL CHECK (semester >= 1 AND semester <= 8),
+    year INTEGER NOT NULL CHECK (year >= 1 AND year <= 4),
+    type TEXT DEFAULT 'theory' CHECK (type IN ('theory', 'lab', 'free')),
+    is_cross_dept INTEGER DEFAULT 0,
+    teaching_dept TEXT,
+    is_finalized INTEGER DEFAULT 0,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    CONSTRAINT unique_faculty_schedule UNIQUE (faculty_name, day, time_slot, academic_year)
+);
+
+CREATE TABLE IF NOT EXISTS faculty_assignments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    subject_id INTEGER NOT NULL REFERENCES subjects(id) ON DELETE CASCADE,
+    faculty_id INTEGER NOT NULL REFERENCES faculty(id) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    academic_year TEXT NOT NULL,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    CONSTRAINT unique_faculty_assignment UNIQUE (subject_id, faculty_id, section, academic_year)
+);
+
+CREATE TABLE IF NOT EXISTS rooms (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    type TEXT NOT NULL DEFAULT 'classroom' CHECK (type IN ('classroom', 'lab')),
+    capacity INTEGER CHECK (capacity >= 1),
+    department TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_subjects_dept_year_sem ON subjects(department, academic_year, year, semester);
+CREATE INDEX IF NOT EXISTS idx_subjects_type ON subjects(type);
+CREATE INDEX IF NOT EXISTS idx_subjects_name ON subjects(name);
+CREATE INDEX IF NOT EXISTS idx_subjects_sub_code ON subjects(department, sub_code);
+
+CREATE INDEX IF NOT EXISTS idx_faculty_dept ON faculty(department);
+CREATE INDEX IF NOT EXISTS idx_faculty_initials ON faculty(initials);
+CREATE INDEX IF NOT EXISTS idx_faculty_name ON faculty(name);
+
+CREATE INDEX IF NOT EXISTS idx_timetables_dept_section ON timetables(department, section);
+CREATE INDEX IF NOT EXISTS idx_timetables_faculty ON timetables(faculty_name);
+CREATE INDEX IF NOT EXISTS idx_timetables_day_slot ON timetables(day, time_slot);
+CREATE INDEX IF NOT EXISTS idx_timetables_faculty_schedule ON timetables(faculty_name, day, time_slot);
+CREATE INDEX IF NOT EXISTS idx_timetables_dept_section_schedule ON timetables(department, section, day, time_slot);
+CREATE INDEX IF NOT EXISTS idx_timetables_year_faculty ON timetables(academic_year, faculty_name);
+CREATE INDEX IF NOT EXISTS idx_timetables_scope ON timetables(department, academic_year, year, semester, is_finalized);
+CREATE INDEX IF NOT EXISTS idx_timetables_year_room ON timetables(academic_year, room);
+CREATE UNIQUE INDEX IF NOT EXISTS unique_section_slot
+    ON timetables(department, academic_year, year, semester, section, day, time_slot, is_finalized);
+
+CREATE INDEX IF NOT EXISTS idx_assignments_subject ON faculty_assignments(subject_id);
+CREATE INDEX IF NOT EXISTS idx_assignments_faculty ON faculty_assignments(faculty_id);
+CREATE INDEX IF NOT EXISTS idx_assignments_year ON faculty_assignments(academic_year);
+"""
+
+# SQLite stores booleans as 0/1; these are converted back so JSON responses match Supabase.
+BOOLEAN_COLUMNS = {'is_cross_dept', 'is_finalized'}
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _ident(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid column or table name: {name!r}")
+    return name
+
+
+class SQLiteRepository(TimetableRepository):
+    """Repository over a local SQLite file with the schema of complete_database_setup.sql.
+
+    Each thread gets its own connection (WAL mode, so readers do not block the
+    writer); writes that must be atomic run in one transaction.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self.connection().executescript(SQLITE_SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            if self.path != ':memory:':
+                conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict[str, Any]:
+        out = dict(row)
+        for column in BOOLEAN_COLUMNS.intersection(out):
+            if out[column] is not None:
+                out[column] = bool(out[column])
+        return out
+
+    @staticmethod
+    def _columns(columns: str) -> str:
+        if columns.strip() == '*':
+            return '*'
+        return ', '.join(_ident(c.strip()) for c in columns.split(',') if c.strip())
+
+    @staticmethod
+    def _where(filters: Optional[Filters], in_filters: Optional[Dict[str, Iterable[Any]]] = None) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, value in (filters or {}).items():
+            if value is None:
+                clauses.append(f"{_ident(column)} IS NULL")
+            else:
+                clauses.append(f"{_ident(column)} = ?")
+                params.append(value)
+        for column, values in (in_filters or {}).items():
+            values = list(values)
+            clauses.append(f"{_ident(column)} IN ({', '.join('?' * len(values))})" if values else '0')
+            params.extend(values)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def select(self, table, columns='*', filters=None, in_filters=None, order=None, desc=False, limit=None):
+        where, params = self._where(filters, in_filters)
+        sql = f"SELECT {self._columns(columns)} FROM {_ident(table)}{where}"
+        if order:
+            sql += f" ORDER BY {_ident(order)}{' DESC' if desc else ''}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with db_request(self.backend, table, 'select'):
+            return [self._row(r) for r in self.connection().execute(sql, params)]
+
+    def select_pages(self, table, columns='*', filters=None, page_size=PAGE_SIZE):
+        where, params = self._where(filters)
+        sql = f"SELECT {self._columns(columns)} FROM {_ident(table)}{where} ORDER BY id"
+        with db_request(self.backend, table, 'select'):
+            cursor = self.connection().execute(sql, params)
+        while True:
+            batch = cursor.fetchmany(page_size)
+            if not batch:
+                return
+            yield [self._row(r) for r in batch]
+
+    def count(self, table, filters=None):
+        where, params = self._where(filters)
+        with db_request(self.backend, table, 'count'):
+            return self.connection().execute(f"SELECT COUNT(*) FROM {_ident(table)}{where}", params).fetchone()[0]
+
+    def _insert(self, conn: sqlite3.Connection, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        out = []
+        with db_request(self.backend, table, 'insert'):
+            for row in rows:
+                columns = [_ident(c) for c in row]
+                sql = (f"INSERT INTO {_ident(table)} ({', '.join(columns)}) "
+                       f"VALUES ({', '.join('?' * len(columns))}) RETURNING *")
+                out.extend(self._row(r) for r in conn.execute(sql, list(row.values())).fetchall())
+        return out
+
+    def _upsert(self, conn: sqlite3.Connection, table: str, rows: List[Dict[str, Any]],
+                on_conflict: Iterable[str]) -> List[Dict[str, Any]]:
+        target = ', '.join(_ident(c) for c in on_conflict)
+        out = []
+        with db_request(self.backend, table, 'upsert'):
+            for row in rows:
+                columns = [_ident(c) for c in row]
+                updates = ', '.join(f"{c} = excluded.{c}" for c in columns)
+                sql = (f"INSERT INTO {_ident(table)} ({', '.join(columns)}) "
+                       f"VALUES ({', '.join('?' * len(columns))}) "
+                       f"ON CONFLICT ({target}) DO UPDATE SET {updates} RETURNING *")
+                out.extend(self._row(r) for r in conn.execute(sql, list(row.values())).fetchall())
+        return out
+
+    def _delete(self, conn: sqlite3.Connection, table: str, filters: Filters,
+                in_filters: Optional[Dict[str, Iterable[Any]]] = None) -> List[Dict[str, Any]]:
+        where, params = self._where(filters, in_filters)
+        with db_request(self.backend, table, 'delete'):
+            return [self._row(r) for r in conn.execute(f"DELETE FROM {_ident(table)}{where} RETURNING *", params).fetchall()]
+
+    def insert(self, table, rows):
+        conn = self.connection()
+        with conn:
+            return self._insert(conn, table, rows)
+
+    def upsert(self, table, rows, on_conflict):
+        conn = self.connection()
+        with conn:
+            return self._upsert(conn, table, rows, on_conflict)
+
+    def delete(self, table, filters, in_filters=None):
+        conn = self.connection()
+        with conn:
+            return self._delete(conn, table, filters, in_filters)
+
+    def replace_section_timetable(self, department, section, academic_year, year, semester, rows):
+        conn = self.connection()
+        with conn:
+            deleted = self._delete(conn, 'timetables', {'department': department, 'section': section,
+                                                        'academic_year': academic_year, 'year': int(year),
+                                                        'semester': int(semester)})
+            inserted = self._insert(conn, 'timetables', rows)
+        return len(deleted), len(inserted)
+
+    def sync_section_timetable(self, department, section, academic_year, year, semester, rows):
+        rows = [dict(row, is_finalized=False) for row in rows]
+        conn = self.connection()
+        with conn:
+            where, params = self._where(_section_scope(department, section, academic_year, year, semester))
+            with db_request(self.backend, 'timetables', 'select'):
+                current = [self._row(r) for r in conn.execute(
+                    f"SELECT {self._columns(_delta_columns(rows))} FROM timetables{where} ORDER BY id", params)]
+            stale, changed = section_delta(current, rows)
+            if stale:
+                self._delete(conn, 'timetables', {}, {'id': stale})
+            if changed:
+                self._upsert(conn, 'timetables', changed, SECTION_SLOT_KEY)
+        return len(stale), len(changed)
+
+    def replace_assignments(self, academic_year, rows):
+        conn = self.connection()
+        with conn:
+            self._delete(conn, 'faculty_assignments', {'academic_year': academic_year})
+            return len(self._insert(conn, 'faculty_assignments', rows))
+
+    def finalize_timetable(self, department, academic_year, year, semester, rows):
+        scope = {'department': department, 'academic_year': academic_year, 'year': year,
+                 'semester': semester, 'is_finalized': True}
+        conn = self.connection()
+        with conn:
+            self._delete(conn, 'timetables', scope)
+            self._insert(conn, 'timetables', [dict(row, **scope, faculty_department=row.get('faculty_department') or department,
+                                                   is_cross_dept=bool(row.get('is_cross_dept')))
+                                              for row in rows])
+
+    def faculty_has_conflict(self, faculty_name, day, time_slot, academic_year):
+        return self.count('timetables', {'faculty_name': faculty_name, 'day': day, 'time_slot': time_slot,
+                                         'academic_year': academic_year, 'is_finalized': True}) > 0
+
+
+def replicate(source: TimetableRepository, target: SQLiteRepository, tables: Iterable[str] = TABLES) -> Dict[str, int]:
+    """Copy every row of tables from source into target, replacing what target held."""
+    copied = {}
+    conn = target.connection()
+    with conn:
+        for table in tables:
+            known = {info[1] for info in conn.execute(f"PRAGMA table_info({_ident(table)})")}
+            # Columns the replica does not have (added to the live database later) are dropped.
+            rows = [{k: v for k, v in row.items() if k in known} for row in source.select(table, order='id')]
+            conn.execute(f"DELETE FROM {_ident(table)}")
+            target._insert(conn, table, rows)
+            copied[table] = len(rows)
+    return copied
+
+
+_repository: Optional[TimetableRepository] = None
+_repository_lock = threading.Lock()
+
+
+def get_repository() -> TimetableRepository:
+    """Process-wide repository for the configured TIMETABLE_BACKEND."""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            if BACKEND == 'sqlite':
+                _repository = SQLiteRepository(SQLITE_PATH)
+            elif BACKEND == 'supabase':
+                from supabase_client import get_supabase_client
+                _repository = SupabaseRepository(get_supabase_client())
+            else:
+                raise ValueError(f"Unknown TIMETABLE_BACKEND '{BACKEND}'. Expected 'supabase' or 'sqlite'")
+        return _repository
+
+
+def set_repository(repository: Optional[TimetableRepository]) -> None:
+    """Use a specific repository (e.g. a replica in a script); None reverts to the configured one."""
+    global _repository
+    with _repository_lock:
+        _repository = repository
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Local SQLite replica of the timetable database')
+    sub = parser.add_subparsers(dest='command', required=True)
+    rep = sub.add_parser('replicate', help='copy the Supabase tables into a SQLite file')
+    rep.add_argument('--db', default=SQLITE_PATH)
+    rep.add_argument('--tables', nargs='*', default=list(TABLES))
+    args = parser.parse_args()
+    from supabase_client import get_supabase_client
+    counts = replicate(SupabaseRepository(get_supabase_client()), SQLiteRepository(args.db), args.tables)
+    for table, n in counts.items():
+        print(f"{table}: {n} rows")
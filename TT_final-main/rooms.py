@@ -0,0 +1,271 @@
+import sys
+from typing import List, Dict, Any, Optional, Iterable, NamedTuple, Callable, Tuple
+
+from supabase_queries import ROOM_BOOKING_COLUMNS
+
+ROOM_TYPES = ('classroom', 'lab')
+
+# Inventory used while the rooms table is empty (or missing): the classrooms and
+# labs the generators used to draw room names from at random.
+DEFAULT_CLASSROOMS = [f"Room-{n}" for n in range(101, 141)]
+DEFAULT_LABS = [f"Lab-{n}" for n in range(1, 11)]
+
+
+def room_kind(session_type: Optional[str]) -> Optional[str]:
+    """Room type a session needs: 'lab', 'classroom', or None for free periods."""
+    typ = (session_type or 'theory').lower()
+    if typ == 'free':
+        return None
+    return 'lab' if typ == 'lab' else 'classroom'
+
+
+class Room(NamedTuple):
+    name: str
+    type: str
+    capacity: Optional[int] = None
+    department: Optional[str] = None
+
+    def fits(self, strength: Optional[int]) -> bool:
+        return not strength or not self.capacity or self.capacity >= strength
+
+
+class RoomRegistry:
+    """The rooms generators may book, by type.
+
+    A room with a department belongs to it; rooms without one are shared.
+    candidates() lists the rooms a section can use, its own department's first
+    and, within that, the smallest that seats the section (unknown capacity last).
+    """
+
+    def __init__(self, rooms: Iterable[Room]):
+        self.rooms: Dict[str, Room] = {}
+        for room in rooms:
+            self.rooms.setdefault(room.name, room)
+        self._candidates: Dict[Tuple[str, Optional[int], Optional[str]], List[Room]] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> 'RoomRegistry':
+        rooms = []
+        for row in rows:
+            name = (row.get('name') or '').strip()
+            if not name:
+                continue
+            kind = 'lab' if (row.get('type') or '').lower() in ('lab', 'laboratory') else 'classroom'
+            try:
+                capacity = int(row['capacity']) if row.get('capacity') else None
+            except (TypeError, ValueError):
+                capacity = None
+            rooms.append(Room(name, kind, capacity, row.get('department') or None))
+        return cls(rooms)
+
+    @classmethod
+    def default(cls) -> 'RoomRegistry':
+        return cls([Room(n, 'classroom') for n in DEFAULT_CLASSROOMS] + [Room(n, 'lab') for n in DEFAULT_LABS])
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.rooms)
+
+    def candidates(self, kind: str, strength: Optional[int] = None,
+                   department: Optional[str] = None) -> List[Room]:
+        key = (kind, strength or None, department)
+        found = self._candidates.get(key)
+        if found is None:
+            found = [r for r in self.rooms.values()
+                     if r.type == kind and r.fits(strength) and r.department in (None, department)]
+            found.sort(key=lambda r: (r.department is None, r.capacity is None, r.capacity or 0))
+            self._candidates[key] = found
+        return found
+
+
+def load_room_registry(repository) -> RoomRegistry:
+    """The rooms table as a registry; the default inventory when it is empty or unreadable."""
+    try:
+        rows = repository.rooms()
+    except Exception as e:
+        print(f"load_room_registry error: {e}", file=sys.stderr)
+        rows = []
+    return RoomRegistry.from_rows(rows) if rows else RoomRegistry.default()
+
+
+class RoomAllocator:
+    """College-wide room occupancy: one slot bitmask per (room, day).
+
+    Built from a bulk read of the room bookings in timetables, like
+    FacultyOccupancyIndex, so whether a room is free for a cell or a lab pair is
+    one mask test. A lab row is stored once, at the first slot of its pair, and
+    books the whole pair.
+    """
+
+    def __init__(self, registry: RoomRegistry, days: List[str], slot_ids: List[Any],
+                 continuous_slots: List[List[Any]]):
+        self.registry = registry
+        self.days = list(days)
+        self.slot_ids = list(slot_ids)
+        self.day_index = {d: i for i, d in enumerate(self.days)}
+        self.slot_index = {s: i for i, s in enumerate(self.slot_ids)}
+        self.continuous_slots = [list(pair) for pair in continuous_slots]
+        self.pair_masks = [sum(1 << self.slot_index[s] for s in pair) for pair in continuous_slots]
+        self.masks: Dict[str, List[int]] = {}
+        self.double_booked: Dict[str, int] = {}
+
+    def copy(self) -> 'RoomAllocator':
+        clone = RoomAllocator(self.registry, self.days, self.slot_ids, self.continuous_slots)
+        clone.masks = {room: list(m) for room, m in self.masks.items()}
+        clone.double_booked = dict(self.double_booked)
+        return clone
+
+    def _shape(self, slot_i: int, kind: Optional[str]) -> int:
+        bit = 1 << slot_i
+        if kind == 'lab':
+            for pair in self.pair_masks:
+                if pair & bit:
+                    return pair
+        return bit
+
+    def add(self, room: Optional[str], day: Optional[str], slot: Any, session_type: Optional[str] = None) -> None:
+        kind = room_kind(session_type)
+        if not room or room == 'N/A' or kind is None or day not in self.day_index:
+            return
+        try:
+            slot_i = self.slot_index.get(int(slot))
+        except (TypeError, ValueError):
+            return
+        if slot_i is not None:
+            self.reserve(room, self.day_index[day], self._shape(slot_i, kind))
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]], skip: Optional[Callable[[Dict[str, Any]], bool]] = None) -> None:
+        for row in rows:
+            if skip is None or not skip(row):
+                self.add(row.get('room'), row.get('day'), row.get('time_slot'), row.get('type'))
+
+    def add_timetable(self, timetable: Dict[str, Dict[Any, Optional[Dict[str, Any]]]]) -> None:
+        """Reserve the rooms of every cell of a {day: {slot: entry}} timetable."""
+        for day, day_data in timetable.items():
+            day_i = self.day_index.get(day)
+            if day_i is None:
+                continue
+            for slot_id, entry in day_data.items():
+                slot_i = self.slot_index.get(int(slot_id)) if str(slot_id).isdigit() else None
+                room = entry.get('room') if entry else None
+                if slot_i is None or not room or room == 'N/A' or room_kind(entry.get('type')) is None:
+                    continue
+                # Both cells of a lab name it; only cells not yet booked are added.
+                if not self.busy(room, day_i) & (1 << slot_i):
+                    self.reserve(room, day_i, 1 << slot_i)
+
+    def busy(self, room: str, day_i: int) -> int:
+        days = self.masks.get(room)
+        return days[day_i] if days is not None else 0
+
+    def is_free(self, room: str, day_i: int, mask: int) -> bool:
+        return not self.busy(room, day_i) & mask
+
+    def reserve(self, room: str, day_i: int, mask: int) -> None:
+        days = self.masks.get(room)
+        if days is None:
+            days = self.masks[room] = [0] * len(self.days)
+        overlap = days[day_i] & mask
+        if overlap:
+            self.double_booked[room] = self.double_booked.get(room, 0) + overlap.bit_count()
+        days[day_i] |= mask
+
+    def free_room(self, kind: str, day_i: int, mask: int, strength: Optional[int] = None,
+                  department: Optional[str] = None) -> Optional[str]:
+        for room in self.registry.candidates(kind, strength, department):
+            if not self.busy(room.name, day_i) & mask:
+                return room.name
+        return None
+
+    def open_masks(self, strength: Optional[int] = None, department: Optional[str] = None) -> Dict[str, List[int]]:
+        """Per room type and day, the cells (lab pairs for labs) that at least one room
+        the section can use is free for. Types without such rooms are left out."""
+        shapes = {'lab': self.pair_masks, 'classroom': [1 << i for i in range(len(self.slot_ids))]}
+        out: Dict[str, List[int]] = {}
+        for kind in ROOM_TYPES:
+            rooms = self.registry.candidates(kind, strength, department)
+            if not rooms:
+                continue
+            open_days = [0] * len(self.days)
+            for day_i in range(len(self.days)):
+                for room in rooms:
+                    busy = self.busy(room.name, day_i)
+                    for shape in shapes[kind]:
+                        if not busy & shape:
+                            open_days[day_i] |= shape
+            out[kind] = open_days
+        return out
+
+    def assign(self, cells: List[Tuple[Any, str, int, int]], strength: Optional[int] = None,
+               department: Optional[str] = None) -> Dict[Any, str]:
+        """Book a room for each (key, room type, day index, slot mask) and return key -> room.
+
+        Labs are booked first. A section's classes share one classroom when a
+        classroom is free for all of them; otherwise each takes the first free
+        one. Keys left without a free room are missing from the result.
+        """
+        home_days = [0] * len(self.days)
+        for _, kind, day_i, mask in cells:
+            if kind == 'classroom':
+                home_days[day_i] |= mask
+        home = None
+        if any(home_days):
+            for room in self.registry.candidates('classroom', strength, department):
+                if not any(self.busy(room.name, d) & m for d, m in enumerate(home_days)):
+                    home = room.name
+                    break
+        out: Dict[Any, str] = {}
+        for key, kind, day_i, mask in sorted(cells, key=lambda c: c[1] != 'lab'):
+            room = home if kind == 'classroom' and home else self.free_room(kind, day_i, mask, strength, department)
+            if room is not None:
+                self.reserve(room, day_i, mask)
+                out[key] = room
+        return out
+
+    def utilization(self) -> Dict[str, Any]:
+        """Booked cells per room and room type, the busiest cell of each type and the
+        rooms booked in timetables but missing from the registry."""
+        n_slots = len(self.slot_ids)
+        cells = len(self.days) * n_slots
+
+        def usage(name: str) -> Dict[str, Any]:
+            days = self.masks.get(name) or [0] * len(self.days)
+            booked = sum(m.bit_count() for m in days)
+            return {'booked': booked, 'utilization': round(100.0 * booked / cells, 1) if cells else 0.0,
+                    'by_day': {day: days[i].bit_count() for i, day in enumerate(self.days)},
+                    'double_booked': self.double_booked.get(name, 0)}
+
+        rooms = [dict(name=r.name, type=r.type, capacity=r.capacity, department=r.department, **usage(r.name))
+                 for r in self.registry.rooms.values()]
+        by_type: Dict[str, Any] = {}
+        for kind in ROOM_TYPES:
+            names = [r.name for r in self.registry.rooms.values() if r.type == kind]
+            if not names:
+                continue
+            booked = sum(r['booked'] for r in rooms if r['type'] == kind)
+            in_use = [[sum(self.busy(n, d) >> s & 1 for n in names) for s in range(n_slots)]
+                      for d in range(len(self.days))]
+            peak = max(max(row) for row in in_use)
+            by_type[kind] = {
+                'rooms': len(names), 'booked': booked,
+                'utilization': round(100.0 * booked / (cells * len(names)), 1) if cells else 0.0,
+                'peak_in_use': peak,
+                'full_cells': sum(1 for row in in_use for n in row if n >= len(names)),
+                'peak_cells': [{'day': self.days[d], 'time_slot': self.slot_ids[s]}
+                               for d, row in enumerate(in_use) for s, n in enumerate(row) if peak and n == peak],
+            }
+        unregistered = [dict(name=name, **usage(name)) for name in self.masks if name not in self.registry.rooms]
+        rooms.sort(key=lambda r: (r['type'], -r['utilization'], r['name']))
+        unregistered.sort(key=lambda r: -r['booked'])
+        return {'cells_per_room': cells, 'by_type': by_type, 'rooms': rooms, 'unregistered': unregistered}
+
+
+def room_utilization(repository, academic_year: str, days: List[str], slot_ids: List[Any],
+                     continuous_slots: List[List[Any]], finalized: Optional[bool] = True) -> Dict[str, Any]:
+    """Utilization of every registered room in academic_year, streamed page by page."""
+    allocator = RoomAllocator(load_room_registry(repository), days, slot_ids, continuous_slots)
+    rows = 0
+    for page in repository.timetable_pages(academic_year, finalized, columns=ROOM_BOOKING_COLUMNS):
+        allocator.add_rows(page)
+        rows += len(page)
+    return dict(allocator.utilization(), academic_year=academic_year, finalized=finalized, rows_scanned=rows)
@@ -0,0 +1,175 @@
+import sys
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional, Tuple
+
+from occupancy_index import FacultyOccupancyIndex
+from placement_problem import PlacementProblem, PlacementState, Position
+from solvers import solve_problem
+from solver_progress import ProgressHook
+from worker_pool import get_process_pool
+from metrics import SECTIONS_GENERATED
+from session_records import SessionRecord
+from rooms import RoomAllocator, room_kind
+
+
+def _solve_task(task: Dict[str, Any]) -> Tuple[List[Optional[Position]], str]:
+    """Worker entry point: solve one section against an occupancy snapshot."""
+    problem = PlacementProblem(task['sessions'], task['days'], task['slot_ids'],
+                               task['continuous_slots'], task['occupancy'], task['room_open'])
+    state, status = solve_problem(problem, task['engine'], task['engine_options'])
+    return state.positions, status
+
+
+class ReservationLedger:
+    """Faculty slots and rooms taken so far in a batch: the database snapshot plus
+    every section committed in this run. A section is only committed when none of
+    its faculty cells are already reserved and a room is still free for each of its
+    sessions, so the batch never double-books.
+    """
+
+    def __init__(self, occupancy: FacultyOccupancyIndex, rooms: RoomAllocator):
+        self.occupancy = occupancy.copy()
+        self.rooms = rooms.copy()
+
+    def snapshot(self) -> FacultyOccupancyIndex:
+        return self.occupancy.copy()
+
+    def _cells(self, state: PlacementState):
+        problem = state.problem
+        for idx, pos in enumerate(state.positions):
+            faculty = problem.sessions[idx].faculty_name
+            if pos is None or not faculty:
+                continue
+            day, slots = problem.describe(pos)
+            for slot in slots:
+                yield faculty, day, slot
+
+    def clashes(self, state: PlacementState, strength: Optional[int] = None,
+                department: Optional[str] = None) -> List[Tuple[str, str, int]]:
+        found = [cell for cell in self._cells(state) if self.occupancy.is_busy(*cell)]
+        problem = state.problem
+        for idx, pos in enumerate(state.positions):
+            kind = room_kind(problem.sessions[idx].type)
+            if pos is not None and kind is not None and self.rooms.free_room(kind, pos[0], pos[1], strength, department) is None:
+                day, slots = problem.describe(pos)
+                found.extend((kind, day, slot) for slot in slots)
+        return found
+
+    def reserve(self, state: PlacementState) -> None:
+        for cell in self._cells(state):
+            self.occupancy.add(*cell)
+
+
+class ParallelSectionScheduler:
+    """Solve a department's sections concurrently in the process pool.
+
+    Every section is solved against a snapshot of the ledger. Results are
+    committed in completion order; a result that collides with a section
+    committed after its snapshot was taken is re-solved against a fresh snapshot,
+    up to max_retries times. Sections still colliding after that are re-solved
+    one by one in this process against the final ledger, as the sequential path
+    would.
+
+    on_event (optional) gets 'section_started' when a section is first submitted
+    and 'section_finished' when its result is final. Solver progress stays in
+    the worker processes and is not forwarded.
+    """
+
+    def __init__(self, ga, department: str, academic_year: Optional[str], engine: str = 'greedy',
+                 engine_options: Optional[Dict[str, Any]] = None, max_retries: int = 2,
+                 strengths: Optional[Dict[str, Optional[int]]] = None):
+        self.ga = ga
+        self.department = department
+        self.academic_year = academic_year
+        self.engine = engine
+        self.engine_options = engine_options or {}
+        self.max_retries = max(0, int(max_retries))
+        self.strengths = strengths or {}
+
+    def _task(self, sessions: List[SessionRecord], occupancy: FacultyOccupancyIndex,
+              room_open: Dict[str, List[int]]) -> Dict[str, Any]:
+        return {
+            'sessions': sessions, 'days': self.ga.days,
+            'slot_ids': [s['slot_id'] for s in self.ga.time_slots],
+            'continuous_slots': self.ga.continuous_slots, 'occupancy': occupancy, 'room_open': room_open,
+            'engine': self.engine, 'engine_options': self.engine_options
+        }
+
+    def _state_from(self, sessions: List[SessionRecord], positions: List[Optional[Position]]) -> PlacementState:
+        state = self.ga.new_problem(sessions, None).new_state()
+        for idx, pos in enumerate(positions):
+            if pos is not None:
+                state.place(idx, pos)
+        return state
+
+    def _room_open(self, name: str, ledger: ReservationLedger) -> Dict[str, List[int]]:
+        return ledger.rooms.open_masks(self.strengths.get(name), self.department)
+
+    def _solve_here(self, name: str, sessions: List[SessionRecord],
+                    ledger: ReservationLedger) -> Tuple[PlacementState, str]:
+        problem = self.ga.new_problem(sessions, ledger.snapshot(), self._room_open(name, ledger))
+        return solve_problem(problem, self.engine, self.engine_options)
+
+    def run(self, sections: List[Tuple[str, List[Dict[str, Any]]]],
+            on_event: Optional[ProgressHook] = None) -> Dict[str, Dict[str, Any]]:
+        emit = on_event or (lambda event: None)
+        sessions = {name: self.ga.build_section_sessions(self.department, data, self.academic_year)
+                    for name, data in sections}
+        all_faculty = [s.faculty_name for queue in sessions.values() for s in queue]
+        ledger = ReservationLedger(self.ga.get_occupancy_index(self.academic_year, all_faculty),
+                                   self.ga.get_room_allocator(self.academic_year))
+
+        pool = get_process_pool()
+        attempts = {name: 0 for name in sessions}
+        futures: Dict[Future, str] = {}
+        results: Dict[str, Dict[str, Any]] = {}
+        deferred: List[str] = []
+
+        def finish(name: str, state: PlacementState, status: str) -> None:
+            # Only complete sections book their rooms on the ledger.
+            rooms = ledger.rooms if not (state.n_unplaced or state.empty_cells()) else ledger.rooms.copy()
+            results[name] = self.ga.section_result(self.department, name, state, rooms, self.strengths.get(name),
+                                                   status)
+            SECTIONS_GENERATED.inc(engine=self.engine, valid=str(bool(results[name].get('valid'))).lower())
+            emit({'event': 'section_finished', 'section': name, 'valid': results[name]['valid'],
+                  'error': results[name].get('error'), 'solver_status': status})
+
+        def submit(name: str) -> None:
+            attempts[name] += 1
+            task = self._task(sessions[name], ledger.snapshot(), self._room_open(name, ledger))
+            futures[pool.submit(_solve_task, task)] = name
+
+        for name in sessions:
+            emit({'event': 'section_started', 'section': name})
+            submit(name)
+
+        while futures:
+            done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = futures.pop(fut)
+                try:
+                    positions, status = fut.result()
+                    state = self._state_from(sessions[name], positions)
+                except Exception as e:
+                    print(f"Parallel solve failed for section {name}, solving in-process: {e}", file=sys.stderr)
+                    state, status = self._solve_here(name, sessions[name], ledger)
+                if state.n_unplaced or state.empty_cells():
+                    finish(name, state, status)
+                elif ledger.clashes(state, self.strengths.get(name), self.department):
+                    if attempts[name] <= self.max_retries:
+                        print(f"Section {name} collided with a committed section, retrying", file=sys.stderr)
+                        submit(name)
+                    else:
+                        deferred.append(name)
+                else:
+                    ledger.reserve(state)
+                    finish(name, state, status)
+
+        # Final repair: sections that kept colliding are solved sequentially against the ledger.
+        for name in deferred:
+            state, status = self._solve_here(name, sessions[name], ledger)
+            if not (state.n_unplaced or state.empty_cells()):
+                ledger.reserve(state)
+            finish(name, state, status)
+
+        return {name: results[name] for name, _ in sections}
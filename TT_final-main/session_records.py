@@ -0,0 +1,151 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class SessionRecord(Mapping):
+    """One weekly class of a section's placement queue.
+
+    Records are interned by RecordInterner: every weekly class of the same
+    subject and faculty is the same object, so a placement queue is a list of
+    references. faculty_id and subject_id are dense integers (-1 without a
+    faculty). Read-only; also readable as a mapping (session['type']) for code
+    that handled the old dict entries.
+    """
+
+    __slots__ = ('subject_code', 'subject_key', 'faculty_name', 'type', 'periods', 'target_department',
+                 'is_cross_dept', 'teaching_dept', 'priority', 'subject_id', 'faculty_id')
+
+    def __init__(self, subject_code: str, faculty_name: Optional[str], type: str, target_department: Optional[str],
+                 is_cross_dept: bool, teaching_dept: Optional[str], subject_id: int, faculty_id: int):
+        self.subject_code = subject_code
+        self.subject_key = subject_code.strip().upper()
+        self.faculty_name = faculty_name
+        self.type = type
+        self.periods = 2 if type == 'lab' else 1
+        self.target_department = target_department
+        self.is_cross_dept = is_cross_dept
+        self.teaching_dept = teaching_dept
+        self.priority = 1 if type == 'lab' else 2
+        self.subject_id = subject_id
+        self.faculty_id = faculty_id
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"SessionRecord({self.subject_key!r}, {self.type!r}, {self.faculty_name!r})"
+
+
+class CellRecord(Mapping):
+    """One placed session as the API shows it in a timetable cell.
+
+    The session's fields are read through the shared SessionRecord; only the
+    section and room are stored. Both slots of a lab, and every weekly class
+    of a subject in the same room, share one CellRecord. Serialized to JSON by
+    flask_server's JSON provider via to_dict().
+    """
+
+    __slots__ = ('session', 'section', 'room')
+
+    FIELDS = ('subject_code', 'subject_name', 'faculty_name', 'section', 'room', 'type', 'periods',
+              'target_department', 'is_cross_dept', 'teaching_dept')
+
+    def __init__(self, session: SessionRecord, section: str, room: str):
+        self.session = session
+        self.section = section
+        self.room = room
+
+    @property
+    def subject_code(self) -> str:
+        return self.session.subject_code
+
+    @property
+    def subject_name(self) -> str:
+        code = self.session.subject_code
+        return f"{code} Lab" if self.session.type == 'lab' else code
+
+    @property
+    def faculty_name(self) -> Optional[str]:
+        return self.session.faculty_name
+
+    @property
+    def type(self) -> str:
+        return self.session.type
+
+    @property
+    def periods(self) -> int:
+        return self.session.periods
+
+    @property
+    def target_department(self) -> Optional[str]:
+        return self.session.target_department
+
+    @property
+    def is_cross_dept(self) -> bool:
+        return self.session.is_cross_dept
+
+    @property
+    def teaching_dept(self) -> Optional[str]:
+        return self.session.teaching_dept
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"CellRecord({self.session.subject_key!r}, {self.section!r}, {self.room!r})"
+
+
+class RecordInterner:
+    """Shared SessionRecords and CellRecords for one generation request, with
+    dense integer ids for the faculty and subjects they mention."""
+
+    def __init__(self):
+        self.faculty_ids: Dict[str, int] = {}
+        self.subject_ids: Dict[str, int] = {}
+        self._sessions: Dict[Tuple[Any, ...], SessionRecord] = {}
+        self._cells: Dict[Tuple[int, str, str], CellRecord] = {}
+
+    def faculty_id(self, faculty_name: Optional[str]) -> int:
+        if not faculty_name:
+            return -1
+        return self.faculty_ids.setdefault(faculty_name, len(self.faculty_ids))
+
+    def subject_id(self, subject_key: str) -> int:
+        return self.subject_ids.setdefault(subject_key, len(self.subject_ids))
+
+    def session(self, subject_code: str, faculty_name: Optional[str], type: str,
+                target_department: Optional[str] = None, is_cross_dept: bool = False,
+                teaching_dept: Optional[str] = None) -> SessionRecord:
+        key = (subject_code, faculty_name, type, target_department, bool(is_cross_dept), teaching_dept)
+        record = self._sessions.get(key)
+        if record is None:
+            record = self._sessions[key] = SessionRecord(
+                subject_code, faculty_name, type, target_department, bool(is_cross_dept), teaching_dept,
+                self.subject_id(subject_code.strip().upper()), self.faculty_id(faculty_name))
+        return record
+
+    def cell(self, session: SessionRecord, section: str, room: str) -> CellRecord:
+        key = (id(session), section, room)
+        cell = self._cells.get(key)
+        if cell is None:
+            cell = self._cells[key] = CellRecord(session, section, room)
+        return cell
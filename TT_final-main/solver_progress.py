@@ -0,0 +1,71 @@
+import sys
+import time
+from typing import Any, Callable, Dict, Optional
+
+ProgressHook = Callable[[Dict[str, Any]], None]
+
+
+def log_progress(event: Dict[str, Any]) -> None:
+    """Default hook: log placements to stderr the way the solvers always have."""
+    if event.get('event') != 'placed':
+        return
+    if event['type'] == 'lab':
+        print(f"PLACED LAB: {event['subject_key']} on {event['day']}", file=sys.stderr)
+    else:
+        print(f"PLACED {event['type'].upper()}: {event['subject_key']} on {event['day']} slot {event['slots'][0]}",
+              file=sys.stderr)
+
+
+class SolveProgress:
+    """Structured progress events for one section solve.
+
+    Every event is a dict with an 'event' name ('placed' or 'progress'), the
+    stage that produced it, the seconds elapsed since the solve started and the
+    context given here (e.g. section). 'progress' events carry sessions placed,
+    total sessions and the best penalty so far; they are rate-limited to one per
+    `interval` seconds unless forced, so engines may report every generation.
+    """
+
+    def __init__(self, hook: Optional[ProgressHook] = None, interval: float = 0.5, **context: Any):
+        self.hook = hook or log_progress
+        self.interval = float(interval)
+        self.context = context
+        self.started = time.monotonic()
+        self._last = None
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        event.update(self.context)
+        event['elapsed'] = round(time.monotonic() - self.started, 3)
+        self.hook(event)
+
+    def placed(self, stage: str, state, idx: int) -> None:
+        """One session placed by a constructive pass."""
+        problem = state.problem
+        session = problem.sessions[idx]
+        day, slots = problem.describe(state.positions[idx])
+        self._emit({
+            'event': 'placed', 'stage': stage, 'subject_key': session.subject_key, 'type': session.type,
+            'faculty_name': session.faculty_name, 'day': day, 'slots': slots,
+            'placed': len(problem.sessions) - state.n_unplaced, 'total': len(problem.sessions)
+        })
+
+    def due(self) -> bool:
+        """True when the next unforced update() would be emitted."""
+        return self._last is None or time.monotonic() - self._last >= self.interval
+
+    def update(self, stage: str, placed: int, total: int, best_penalty: Optional[int] = None,
+               force: bool = False, **extra: Any) -> None:
+        if not (force or self.due()):
+            return
+        self._last = time.monotonic()
+        event: Dict[str, Any] = {'event': 'progress', 'stage': stage, 'placed': placed, 'total': total,
+                                 'best_penalty': best_penalty}
+        event.update(extra)
+        self._emit(event)
+
+    def state(self, stage: str, state, force: bool = False, **extra: Any) -> None:
+        """update() for a whole candidate state."""
+        if not (force or self.due()):
+            return
+        total = len(state.problem.sessions)
+        self.update(stage, total - state.n_unplaced, total, state.penalty(), force=force, **extra)
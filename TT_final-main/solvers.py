@@ -0,0 +1,86 @@
+import sys
+import random
+from typing import Dict, Any, Optional, Tuple
+
+from placement_problem import PlacementProblem, PlacementState
+from ga_engine import GeneticPlacementEngine
+from island_model import IslandModelSearch
+from backtracking_solver import BacktrackingSolver
+from local_search import LocalSearchRepair
+from solver_progress import SolveProgress
+from metrics import PLACEMENT_ATTEMPTS, PLACEMENT_FAILURES
+
+ENGINES = ('greedy', 'ga', 'island', 'exact')
+
+
+def greedy_placement(problem: PlacementProblem, rng=random,
+                     progress: Optional[SolveProgress] = None) -> PlacementState:
+    """Single randomized pass: each session takes the first free slot on a shuffled day."""
+    progress = progress or SolveProgress()
+    state = problem.new_state()
+    for idx, session in enumerate(problem.sessions):
+        subject_key = session.subject_key
+
+        days_to_try = [d for d in range(problem.n_days) if state.day_allowed(idx, d)]
+        rng.shuffle(days_to_try)
+
+        if not days_to_try:
+            print(f"ERROR: No available days for {subject_key} (type: {session.type})", file=sys.stderr)
+            continue
+
+        for day_i in days_to_try:
+            # Candidates already exclude slots taken in the occupancy index
+            for pos in problem.positions_on_day(idx, day_i):
+                if not state.can_place(idx, pos):
+                    continue
+                state.place(idx, pos)
+                progress.placed('greedy', state, idx)
+                break
+            if state.positions[idx] is not None:
+                break
+    return state
+
+
+def solve_problem(problem: PlacementProblem, engine: str = 'greedy',
+                  engine_options: Optional[Dict[str, Any]] = None,
+                  progress: Optional[SolveProgress] = None) -> Tuple[PlacementState, str]:
+    """Run the named engine on a placement problem. Pure CPU, no database access.
+
+    Returns the final state and a status: 'solved' when every session is placed,
+    'infeasible' when the exact solver proved no placement exists, and 'timeout'
+    when the search stopped (budget spent) with sessions still unplaced.
+
+    progress receives every greedy placement, periodic updates from the engine
+    and a final 'done' update; placements are logged to stderr when it is None.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Expected one of: {', '.join(ENGINES)}")
+    engine_options = engine_options or {}
+    seed = engine_options.get('seed')
+    rng = random.Random(seed) if seed is not None else random
+    progress = progress or SolveProgress()
+
+    state = greedy_placement(problem, rng, progress)
+    progress.state('greedy', state, force=True)
+    PLACEMENT_ATTEMPTS.inc(len(problem.sessions), engine=engine)
+    PLACEMENT_FAILURES.inc(state.n_unplaced, engine=engine, stage='greedy')
+    proven_infeasible = False
+    if engine == 'ga' and state.penalty() > 0:
+        state = GeneticPlacementEngine.from_options(problem, engine_options, initial=[state], progress=progress).run()
+    elif engine == 'island' and state.penalty() > 0:
+        state = IslandModelSearch.from_options(problem, engine_options, initial=[state], progress=progress).run()
+    elif engine == 'exact' and (state.n_unplaced or state.empty_cells()):
+        solver = BacktrackingSolver.from_options(problem, engine_options, progress=progress)
+        exact = solver.run()
+        if exact is not None:
+            state = exact
+        proven_infeasible = solver.status == 'infeasible'
+
+    # Finish a partial result by local search rather than returning it invalid.
+    if state.n_unplaced and engine_options.get('repair', True) and not proven_infeasible:
+        state = LocalSearchRepair.from_options(problem, engine_options, progress=progress).run(state)
+    progress.state('done', state, force=True)
+    PLACEMENT_FAILURES.inc(state.n_unplaced, engine=engine, stage='final')
+    if not state.n_unplaced:
+        return state, 'solved'
+    return state, 'infeasible' if proven_infeasible else 'timeout'
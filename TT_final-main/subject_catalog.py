@@ -0,0 +1,77 @@
+import os
+import sys
+from typing import List, Dict, Any, Optional, Tuple
+
+from cache import TTLCache
+
+CATALOG_COLUMNS = 'id,weekly_hours,type,sub_code,name,is_cross_dept,teaching_dept,classes_per_week,updated_at'
+
+# Catalogs are trusted for SUBJECT_CACHE_TTL seconds, then revalidated with a
+# count/updated_at fingerprint and only re-downloaded when it changed.
+SUBJECT_CATALOG_CACHE = TTLCache(maxsize=int(os.getenv('SUBJECT_CACHE_SIZE', '64')),
+                                 ttl=float(os.getenv('SUBJECT_CACHE_TTL', '60')))
+
+
+def normalize_key(value: Any) -> str:
+    """Case- and whitespace-insensitive lookup key for subject codes and names."""
+    return ' '.join(str(value).split()).casefold()
+
+
+def invalidate_subject_cache(department: Optional[str] = None) -> int:
+    """Drop cached catalogs for one department (every department when None)."""
+    return SUBJECT_CATALOG_CACHE.invalidate(None if department is None else (lambda key: key[0] == department))
+
+
+class SubjectCatalog:
+    """One department's subjects indexed by normalized sub_code and name."""
+
+    def __init__(self, rows: List[Dict[str, Any]], fingerprint: Optional[Tuple[int, Any]] = None):
+        self.by_code: Dict[str, Dict[str, Any]] = {}
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            if row.get('sub_code'):
+                self.by_code.setdefault(normalize_key(row['sub_code']), row)
+            if row.get('name'):
+                self.by_name.setdefault(normalize_key(row['name']), row)
+        self.fingerprint = fingerprint if fingerprint is not None else self.fingerprint_of(rows)
+
+    @staticmethod
+    def fingerprint_of(rows: List[Dict[str, Any]]) -> Tuple[int, Any]:
+        stamps = [r.get('updated_at') for r in rows if r.get('updated_at')]
+        return len(rows), max(stamps) if stamps else None
+
+    def resolve(self, code: str) -> Optional[Dict[str, Any]]:
+        """Match by sub_code first, then by name, like the per-subject queries did."""
+        key = normalize_key(code)
+        return self.by_code.get(key) or self.by_name.get(key)
+
+
+def load_subject_catalog(repo, department: Optional[str], academic_year: Optional[str] = None) -> SubjectCatalog:
+    """Return the cached catalog for (department, academic_year), loading it in one query on a miss.
+
+    repo is a repository.TimetableRepository.
+    """
+    key = (department, academic_year)
+    catalog = SUBJECT_CATALOG_CACHE.get(key)
+    if catalog is not None:
+        return catalog
+
+    stale = SUBJECT_CATALOG_CACHE.peek(key)
+    if stale is not None:
+        try:
+            if repo.subject_fingerprint(department, academic_year) == stale.fingerprint:
+                SUBJECT_CATALOG_CACHE.set(key, stale)
+                return stale
+        except Exception as e:
+            print(f"subject catalog revalidation error: {e}", file=sys.stderr)
+
+    try:
+        rows = repo.subjects(department, academic_year, columns=CATALOG_COLUMNS)
+    except Exception as e:
+        if stale is None:
+            raise
+        print(f"subject catalog reload error, serving cached copy: {e}", file=sys.stderr)
+        return stale
+    catalog = SubjectCatalog(rows)
+    SUBJECT_CATALOG_CACHE.set(key, catalog)
+    return catalog
@@ -0,0 +1,72 @@
+import os
+from typing import List, Dict, Any, Optional, Awaitable, Callable, Iterable, Iterator
+
+PAGE_SIZE = int(os.getenv('SUPABASE_PAGE_SIZE', '1000'))
+# Keep in_() lists short enough that the request URL stays well under proxy limits.
+IN_CHUNK_SIZE = int(os.getenv('SUPABASE_IN_CHUNK_SIZE', '100'))
+
+# Columns the solvers need to know who is busy when, and for which class; type
+# tells a lab row (stored once, at the first slot of its pair) from a single period.
+TIMETABLE_CONFLICT_COLUMNS = 'faculty_name,day,time_slot,type,department,year,semester,section,is_finalized'
+# Columns of a room booking, and the class that holds it.
+ROOM_BOOKING_COLUMNS = 'room,day,time_slot,type,department,year,semester,section,is_finalized'
+
+
+def iter_pages(make_query: Callable[[], Any], page_size: int = PAGE_SIZE,
+               execute: Callable[[Any], Any] = lambda query: query.execute()) -> Iterator[List[Dict[str, Any]]]:
+    """Run a select page by page with range(), yielding each non-empty page; make_query must
+    return a fresh, ordered builder. execute runs one page request (repository.SupabaseRepository
+    counts them)."""
+    start = 0
+    while True:
+        resp = execute(make_query().range(start, start + page_size - 1))
+        batch = resp.data or []
+        if batch:
+            yield batch
+        if len(batch) < page_size:
+            return
+        start += page_size
+
+
+def fetch_all_pages(make_query: Callable[[], Any], page_size: int = PAGE_SIZE,
+                    execute: Callable[[Any], Any] = lambda query: query.execute()) -> List[Dict[str, Any]]:
+    """Every row of iter_pages() in one list."""
+    rows: List[Dict[str, Any]] = []
+    for batch in iter_pages(make_query, page_size, execute):
+        rows.extend(batch)
+    return rows
+
+
+async def fetch_all_pages_async(make_query: Callable[[], Any], page_size: int = PAGE_SIZE,
+                                execute: Callable[[Any], Awaitable[Any]] = lambda query: query.execute()) -> List[Dict[str, Any]]:
+    """fetch_all_pages() for async query builders."""
+    rows: List[Dict[str, Any]] = []
+    start = 0
+    while True:
+        resp = await execute(make_query().range(start, start + page_size - 1))
+        batch = resp.data or []
+        rows.extend(batch)
+        if len(batch) < page_size:
+            return rows
+        start += page_size
+
+
+def select_query(supabase, table: str, columns: str = '*', filters: Optional[Dict[str, Any]] = None):
+    """Equality-filtered select ordered by id (for paging); works on sync and async clients alike."""
+    q = supabase.table(table).select(columns)
+    for column, value in (filters or {}).items():
+        q = q.eq(column, value)
+    return q.order('id')
+
+
+def count_query(supabase, table: str, filters: Optional[Dict[str, Any]] = None):
+    """count='exact' select with a one-row page; works on sync and async clients alike."""
+    q = supabase.table(table).select('id', count='exact')
+    for column, value in (filters or {}).items():
+        q = q.eq(column, value)
+    return q.limit(1)
+
+
+def chunked(values: List[Any], size: int = IN_CHUNK_SIZE) -> Iterable[List[Any]]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
@@ -0,0 +1,221 @@
+import heapq
+from typing import List, Dict, Any, Optional, Tuple
+
+from occupancy_index import FacultyOccupancyIndex
+from placement_problem import mask_slots
+
+# Soft penalties of a move's landing cell.
+SAME_DAY_REPEAT_PENALTY = 3
+LAST_PERIOD_PENALTY = 1
+
+# (day index, slot bitmask) of one placed session; a lab covers a continuous pair.
+Cell = Tuple[int, int]
+
+
+class SwapSearch:
+    """Ranked ways to move one session of a single-section timetable.
+
+    The section is indexed once: a free-slot bitmask per day (empty and FREE
+    cells), the occupant of every taken cell, and per-(subject, day) counts for
+    the same-day repeat penalty. Faculty availability elsewhere in the college
+    comes from a FacultyOccupancyIndex, so every candidate is a few mask tests.
+
+    Suggestions are direct moves to a free cell, two-way swaps and short
+    Kempe-chain moves (the displaced session moves on, up to max_chain moves in
+    total, ending in a free cell or the cell the first session left); a lab can
+    also trade its pair with two single sessions, which take the lab's cells. They are
+    ranked by (moves, penalty) and the best k are kept in a bounded heap.
+    """
+
+    def __init__(self, timetable: Dict[str, Dict[Any, Optional[Dict[str, Any]]]], days: List[str],
+                 slot_ids: List[Any], continuous_slots: List[List[Any]], busy: FacultyOccupancyIndex):
+        self.days = list(days)
+        self.slot_ids = list(slot_ids)
+        self.slot_index = {s: i for i, s in enumerate(self.slot_ids)}
+        self.pair_masks = [sum(1 << self.slot_index[s] for s in pair) for pair in continuous_slots]
+        self.single_masks = [1 << i for i in range(len(self.slot_ids))]
+        self.last_bit = 1 << (len(self.slot_ids) - 1)
+        self.busy = busy
+
+        # occupants[i] = (entry, cell); owner[(day_i, slot_i)] = occupant index
+        self.occupants: List[Tuple[Dict[str, Any], Cell]] = []
+        self.owner: Dict[Tuple[int, int], int] = {}
+        self.free = [0] * len(self.days)
+        self.subject_days: Dict[Tuple[Any, int], int] = {}
+        for day_i, day in enumerate(self.days):
+            cells = timetable.get(day) or {}
+            row = [cells.get(s) for s in self.slot_ids]
+            for slot_i, entry in enumerate(row):
+                if not entry or (entry.get('type') or '').lower() == 'free':
+                    self.free[day_i] |= 1 << slot_i
+            for slot_i, entry in enumerate(row):
+                if (day_i, slot_i) in self.owner or self.free[day_i] >> slot_i & 1:
+                    continue
+                mask = 1 << slot_i
+                if (entry.get('type') or '').lower() == 'lab':
+                    # Both cells of a lab pair holding the same lab are one session.
+                    for pair in self.pair_masks:
+                        if pair & mask:
+                            other = mask_slots(pair & ~mask)
+                            if other and row[other[0]] is not None and self._same_session(entry, row[other[0]]):
+                                mask = pair
+                for s in mask_slots(mask):
+                    self.owner[(day_i, s)] = len(self.occupants)
+                self.occupants.append((entry, (day_i, mask)))
+                key = (entry.get('subject_code'), day_i)
+                self.subject_days[key] = self.subject_days.get(key, 0) + 1
+
+    @staticmethod
+    def _same_session(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+        return a is b or (a.get('subject_code') == b.get('subject_code') and a.get('faculty_name') == b.get('faculty_name'))
+
+    def locate(self, entry: Dict[str, Any], day: Optional[str] = None, slot: Any = None) -> Optional[int]:
+        """Occupant index of entry, preferring the one covering (day, slot) when given."""
+        matches = [i for i, (e, _) in enumerate(self.occupants) if e is entry]
+        matches = matches or [i for i, (e, _) in enumerate(self.occupants) if e == entry]
+        if day in self.days and slot in self.slot_index:
+            here = self.owner.get((self.days.index(day), self.slot_index[slot]))
+            if here in matches:
+                return here
+        return matches[0] if matches else None
+
+    def _shapes(self, entry: Dict[str, Any]) -> List[int]:
+        return self.pair_masks if (entry.get('type') or '').lower() == 'lab' else self.single_masks
+
+    def _faculty_free(self, entry: Dict[str, Any], cell: Cell) -> bool:
+        faculty = entry.get('faculty_name')
+        if not faculty or faculty == 'N/A':
+            return True
+        return not self.busy.mask(faculty, self.days[cell[0]]) & cell[1]
+
+    def _penalty(self, entry: Dict[str, Any], source: Optional[Cell], cell: Cell) -> int:
+        day_i, mask = cell
+        repeats = self.subject_days.get((entry.get('subject_code'), day_i), 0)
+        if source is not None and source[0] == day_i:
+            repeats -= 1
+        penalty = SAME_DAY_REPEAT_PENALTY * max(repeats, 0)
+        if mask == self.last_bit and (entry.get('type') or '').lower() != 'lab':
+            penalty += LAST_PERIOD_PENALTY
+        return penalty
+
+    def _holder(self, cell: Cell, vacated: set) -> Optional[int]:
+        """-1 if cell is free (or the cell the moved session left), the occupant index if
+        one session fills it exactly, None if it is mixed or only partly taken."""
+        day_i, mask = cell
+        slots = [(day_i, s) for s in mask_slots(mask)]
+        if all(self.free[day_i] >> s & 1 or (day_i, s) in vacated for _, s in slots):
+            return -1
+        holders = {self.owner.get(c) for c in slots}
+        if len(holders) != 1 or None in holders:
+            return None
+        holder = holders.pop()
+        return holder if self.occupants[holder][1] == cell else None
+
+    def suggest(self, entry: Dict[str, Any], origin: Optional[Cell] = None, k: int = 5,
+                max_chain: int = 3) -> List[Dict[str, Any]]:
+        best: List[Tuple[Tuple[int, int, int], List[Tuple[Dict[str, Any], Optional[Cell], Cell]]]] = []
+        counter = [0]
+
+        def offer(moves: List[Tuple[Dict[str, Any], Optional[Cell], Cell]], penalty: int) -> None:
+            counter[0] += 1
+            item = ((-len(moves), -penalty, -counter[0]), list(moves))
+            if len(best) < k:
+                heapq.heappush(best, item)
+            elif item[0] > best[0][0]:
+                heapq.heapreplace(best, item)
+
+        def worth(moves: int) -> bool:
+            # The heap is full of suggestions with fewer moves and no penalty: stop looking.
+            return len(best) < k or (-best[0][0][0], -best[0][0][1]) > (moves, 0)
+
+        def extend(mover: Dict[str, Any], source: Optional[Cell], moves, penalty: int,
+                   vacated: set, taken: set) -> None:
+            depth = len(moves) + 1
+            if not worth(depth):
+                return
+            for day_i in range(len(self.days)):
+                for mask in self._shapes(mover):
+                    cell = (day_i, mask)
+                    if cell == source or cell in taken or not self._faculty_free(mover, cell):
+                        continue
+                    holder = self._holder(cell, vacated)
+                    if holder is None:
+                        if not moves and source is not None and max_chain >= 3:
+                            self._block_swap(mover, source, cell, offer)
+                        continue
+                    step = moves + [(mover, source, cell)]
+                    cost = penalty + self._penalty(mover, source, cell)
+                    if holder == -1:
+                        offer(step, cost)
+                    elif depth < max_chain:
+                        # The holder is displaced in turn; its cell is refilled by this move.
+                        displaced, held = self.occupants[holder]
+                        extend(displaced, held, step, cost, vacated, taken | {cell})
+
+        vacated = {(origin[0], s) for s in mask_slots(origin[1])} if origin else set()
+        extend(entry, origin, [], 0, vacated, set())
+        ranked = sorted(best, key=lambda item: (-item[0][0], -item[0][1], -item[0][2]))
+        return [self._render(moves, -key[1]) for key, moves in ranked]
+
+    def _block_swap(self, mover: Dict[str, Any], source: Cell, cell: Cell, offer) -> None:
+        """Trade a lab's pair for a pair of two single sessions, which take the lab's cells."""
+        if len(mask_slots(cell[1])) != 2 or len(mask_slots(source[1])) != 2:
+            return
+        held = [self.owner.get((cell[0], s)) for s in mask_slots(cell[1])]
+        if None in held or held[0] == held[1] or any(self.occupants[h][1][1] not in self.single_masks for h in held):
+            return
+        targets = [(source[0], 1 << s) for s in mask_slots(source[1])]
+        for order in (targets, targets[::-1]):
+            moves = [(mover, source, cell)]
+            penalty = self._penalty(mover, source, cell)
+            for h, target in zip(held, order):
+                entry, at = self.occupants[h]
+                if not self._faculty_free(entry, target):
+                    break
+                moves.append((entry, at, target))
+                penalty += self._penalty(entry, at, target)
+            else:
+                offer(moves, penalty)
+
+    def _cell_dict(self, cell: Optional[Cell]) -> Optional[Dict[str, Any]]:
+        if cell is None:
+            return None
+        return {'day': self.days[cell[0]], 'slots': [self.slot_ids[s] for s in mask_slots(cell[1])]}
+
+    def _render(self, moves, penalty: int) -> Dict[str, Any]:
+        entry, source, (day_i, mask) = moves[0]
+        slots = [self.slot_ids[s] for s in mask_slots(mask)]
+        is_lab = (entry.get('type') or '').lower() == 'lab'
+        if len(moves) == 1:
+            where = 'same_day' if source is not None and source[0] == day_i else 'other_day'
+            reason = f"{where}_{'continuous' if is_lab else 'free'}"
+        elif len(moves) == 2 and moves[1][2] == source:
+            reason = 'swap'
+        elif is_lab and all(dst[0] == source[0] and dst[1] & source[1] for _, _, dst in moves[1:]):
+            reason = 'block_swap'
+        else:
+            reason = 'kempe_chain'
+        suggestion: Dict[str, Any] = {'day': self.days[day_i], 'reason': reason,
+                                      'cost': {'moves': len(moves), 'penalty': penalty}}
+        if is_lab:
+            suggestion['slots'] = slots
+        else:
+            suggestion['slot'] = slots[0]
+        suggestion['moves'] = [{'subject_code': e.get('subject_code'), 'faculty_name': e.get('faculty_name'),
+                                'from': self._cell_dict(src), 'to': self._cell_dict(dst)}
+                               for e, src, dst in moves]
+        return suggestion
+
+
+def swap_suggestions(timetable: Dict[str, Dict[Any, Optional[Dict[str, Any]]]], conflict: Dict[str, Any],
+                     busy: FacultyOccupancyIndex, days: List[str], slot_ids: List[Any],
+                     continuous_slots: List[List[Any]], k: int = 5, max_chain: int = 3) -> List[Dict[str, Any]]:
+    """Top-k moves for the last entry of a validate_timetable-style conflict."""
+    entries = [e for e in conflict.get('entries') or [] if e]
+    if not entries:
+        return []
+    victim = entries[-1]
+    search = SwapSearch(timetable, days, slot_ids, continuous_slots, busy)
+    placed = search.locate(victim, conflict.get('day'), conflict.get('slot'))
+    origin = search.occupants[placed][1] if placed is not None else None
+    return search.suggest(victim, origin, k, max_chain)
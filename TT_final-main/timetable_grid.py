@@ -0,0 +1,125 @@
+from array import array
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
+
+EMPTY = -1
+
+
+class SessionTable:
+    """Side table of session metadata, indexed by the integer ids stored in a TimetableGrid."""
+
+    def __init__(self, records: Optional[List[Dict[str, Any]]] = None):
+        self.records: List[Dict[str, Any]] = list(records or [])
+
+    def add(self, record: Dict[str, Any]) -> int:
+        self.records.append(record)
+        return len(self.records) - 1
+
+    def __getitem__(self, session_id: int) -> Dict[str, Any]:
+        return self.records[session_id]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+class TimetableGrid:
+    """Compact days x slots x sections grid of session ids (EMPTY for a free cell).
+
+    Cells live in one flat array('i') with the section as the fastest axis, so a
+    (day, slot) row for every section is contiguous and a day's row for one section
+    is a strided slice. Session details are kept once in a SessionTable; the nested
+    dict shape used by the API is only produced by to_dict().
+    """
+
+    def __init__(self, days: List[str], slot_ids: List[int], sections: Optional[List[Any]] = None,
+                 sessions: Optional[SessionTable] = None):
+        self.days = list(days)
+        self.slot_ids = list(slot_ids)
+        self.sections = list(sections) if sections else [None]
+        self.sessions = sessions if sessions is not None else SessionTable()
+        self.day_index = {d: i for i, d in enumerate(self.days)}
+        self.slot_index = {s: i for i, s in enumerate(self.slot_ids)}
+        self.section_index = {s: i for i, s in enumerate(self.sections)}
+        self.n_days = len(self.days)
+        self.n_slots = len(self.slot_ids)
+        self.n_sections = len(self.sections)
+        self.cells = array('i', [EMPTY]) * (self.n_days * self.n_slots * self.n_sections)
+
+    def copy(self) -> 'TimetableGrid':
+        clone = TimetableGrid.__new__(TimetableGrid)
+        clone.__dict__.update(self.__dict__)
+        clone.cells = array('i', self.cells)
+        return clone
+
+    def _offset(self, day_i: int, slot_i: int, section_i: int) -> int:
+        return (day_i * self.n_slots + slot_i) * self.n_sections + section_i
+
+    def get(self, day_i: int, slot_i: int, section_i: int = 0) -> int:
+        return self.cells[self._offset(day_i, slot_i, section_i)]
+
+    def set(self, day_i: int, slot_i: int, session_id: int, section_i: int = 0) -> None:
+        self.cells[self._offset(day_i, slot_i, section_i)] = session_id
+
+    def clear(self, day_i: int, slot_i: int, section_i: int = 0) -> None:
+        self.cells[self._offset(day_i, slot_i, section_i)] = EMPTY
+
+    def day_row(self, day_i: int, section_i: int = 0) -> array:
+        start = self._offset(day_i, 0, section_i)
+        return self.cells[start:start + self.n_slots * self.n_sections:self.n_sections]
+
+    def occupied_mask(self, day_i: int, section_i: int = 0) -> int:
+        """Bit i is set when slot index i of the day is taken."""
+        mask = 0
+        for i, sid in enumerate(self.day_row(day_i, section_i)):
+            if sid != EMPTY:
+                mask |= 1 << i
+        return mask
+
+    def empty_cells(self) -> int:
+        return self.cells.count(EMPTY)
+
+    def iter_cells(self, section_i: int = 0) -> Iterator[Tuple[int, int, int]]:
+        """Yield (day_i, slot_i, session_id) for every occupied cell of a section."""
+        for day_i in range(self.n_days):
+            for slot_i, sid in enumerate(self.day_row(day_i, section_i)):
+                if sid != EMPTY:
+                    yield day_i, slot_i, sid
+
+    def to_dict(self, section_i: int = 0,
+                render: Optional[Callable[[int], Optional[Dict[str, Any]]]] = None) -> Dict[str, Dict[int, Optional[Dict[str, Any]]]]:
+        """Expand one section into the {day: {slot_id: entry_or_None}} API shape.
+
+        Both cells of a lab share the entry object produced for its session id.
+        """
+        render = render or (lambda sid: self.sessions[sid])
+        rendered: Dict[int, Optional[Dict[str, Any]]] = {}
+        timetable: Dict[str, Dict[int, Optional[Dict[str, Any]]]] = {}
+        for day_i, day in enumerate(self.days):
+            row = self.day_row(day_i, section_i)
+            day_cells: Dict[int, Optional[Dict[str, Any]]] = {}
+            for slot_i, sid in enumerate(row):
+                if sid == EMPTY:
+                    day_cells[self.slot_ids[slot_i]] = None
+                    continue
+                if sid not in rendered:
+                    rendered[sid] = render(sid)
+                day_cells[self.slot_ids[slot_i]] = rendered[sid]
+            timetable[day] = day_cells
+        return timetable
+
+    @classmethod
+    def from_dict(cls, timetable: Dict[str, Dict[int, Optional[Dict[str, Any]]]], days: List[str],
+                  slot_ids: List[int]) -> 'TimetableGrid':
+        """Build a single-section grid from the API shape; cells holding the same entry object share an id."""
+        grid = cls(days, slot_ids)
+        ids: Dict[int, int] = {}
+        for day_i, day in enumerate(grid.days):
+            day_cells = timetable.get(day) or {}
+            for slot_i, slot_id in enumerate(grid.slot_ids):
+                entry = day_cells.get(slot_id)
+                if not entry:
+                    continue
+                key = id(entry)
+                if key not in ids:
+                    ids[key] = grid.sessions.add(entry)
+                grid.set(day_i, slot_i, ids[key])
+        return grid
@@ -0,0 +1,31 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+DEFAULT_WORKERS = int(os.getenv('GENERATION_WORKERS', '0')) or os.cpu_count() or 1
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+# Set by the pool initializer in each worker; a server process that was itself
+# started through multiprocessing (uvicorn --workers / --reload) leaves it False.
+_in_worker = False
+
+
+def _mark_worker() -> None:
+    global _in_worker
+    _in_worker = True
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process-wide solver pool, started on first use and reused across requests."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=DEFAULT_WORKERS, initializer=_mark_worker)
+        return _pool
+
+
+def in_worker_process() -> bool:
+    """True inside a pool worker, where solvers must not start nested pools."""
+    return _in_worker